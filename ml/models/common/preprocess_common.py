@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import shutil
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GroupShuffleSplit
+
+
+def session_positions(groups):
+    """
+    Number the rows of each session, counting from 0 at its first row.
+
+    A session is a run of consecutive rows sharing the same group value, so a window
+    ending at a row with position p only stays within its session if p >= window_size - 1.
+
+    Args:
+        groups (array-like): The group value (e.g. the ID) of every row.
+
+    Returns:
+        np.ndarray: The position of every row within its session.
+    """
+    groups = pd.Series(np.asarray(groups))
+    sessions = groups.ne(groups.shift()).cumsum()
+    return sessions.groupby(sessions).cumcount().to_numpy()
+
+
+def group_train_test_split(groups, test_size=0.3, random_state=42, split_path=None):
+    """
+    Split rows into training and test sets so that no session appears in both.
+
+    Whole groups are assigned to the test set with GroupShuffleSplit, so overlapping
+    windows of one session never end up on both sides. With split_path, the test groups
+    are written to a JSON file on first use and read back on later calls, so every model
+    trained on the same data is evaluated on the same sessions, whichever rows its own
+    preprocessing keeps.
+
+    Args:
+        groups (array-like): The group value (e.g. the ID) of every row.
+        test_size (float): The fraction of groups to assign to the test set.
+        random_state (int): Seed for the shuffle of the groups.
+        split_path (str, optional): JSON file to store the split in or reuse it from.
+
+    Returns:
+        tuple: Integer row positions of the training rows and of the test rows.
+    """
+    groups = np.asarray(groups)
+    if split_path is not None and os.path.exists(split_path):
+        with open(split_path) as f:
+            test_groups = json.load(f)["test_groups"]
+    else:
+        unique = np.unique(groups)
+        splitter = GroupShuffleSplit(
+            n_splits=1, test_size=test_size, random_state=random_state
+        )
+        _, test = next(splitter.split(unique, groups=unique))
+        test_groups = unique[test].tolist()
+        if split_path is not None:
+            with open(split_path, "w") as f:
+                json.dump(
+                    {
+                        "test_size": test_size,
+                        "random_state": random_state,
+                        "test_groups": test_groups,
+                    },
+                    f,
+                )
+    is_test = np.isin(groups, test_groups)
+    return np.flatnonzero(~is_test), np.flatnonzero(is_test)
+
+
+def file_digest(file_path, block_size=1 << 20):
+    """
+    Hash the content of a file without reading it into memory at once.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int): The number of bytes read per block.
+
+    Returns:
+        str: The hex SHA-256 digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(file_path, cache_dir, config):
+    """
+    Locate the cache entry for a source file and a preprocessing configuration.
+
+    Args:
+        file_path (str): Path to the source CSV file.
+        cache_dir (str): Directory holding all cache entries.
+        config (dict): The configuration the cached data depends on.
+
+    Returns:
+        str: The directory of the cache entry.
+    """
+    key = file_digest(file_path) + json.dumps(config, sort_keys=True, default=str)
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest()[:32])
+
+
+def save_frame(df, path, artifacts=None):
+    """
+    Write a DataFrame as memory-mappable .npy files.
+
+    All float columns are stored together as one column-major float32 matrix, every other
+    column as its own array (categoricals as codes). The entry is written to a temporary
+    directory and renamed into place, so readers never see a partial entry.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to store.
+        path (str): The directory of the cache entry.
+        artifacts (dict, optional): Fitted preprocessing objects stored alongside, with joblib.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    float_columns = [col for col in df.columns if pd.api.types.is_float_dtype(df[col])]
+    np.save(
+        os.path.join(tmp_path, "features.npy"),
+        np.asfortranarray(df[float_columns].to_numpy(dtype=np.float32)),
+    )
+    other_columns = []
+    for i, col in enumerate(col for col in df.columns if col not in float_columns):
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values) or isinstance(
+            values.dtype, pd.CategoricalDtype
+        ):
+            values = values.astype("category")
+            categories = values.cat.categories.tolist()
+            values = values.cat.codes
+        else:
+            categories = None
+        file_name = f"column_{i}.npy"
+        np.save(os.path.join(tmp_path, file_name), values.to_numpy())
+        other_columns.append({"name": col, "file": file_name, "categories": categories})
+    if artifacts:
+        joblib.dump(artifacts, os.path.join(tmp_path, "artifacts.joblib"))
+    meta = {
+        "columns": list(df.columns),
+        "float_columns": float_columns,
+        "other_columns": other_columns,
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def load_frame(path):
+    """
+    Load a DataFrame written by save_frame without copying its float features.
+
+    The float32 matrix is memory-mapped read-only and wrapped as a single DataFrame block;
+    the remaining columns are inserted back at their original positions. The index is not
+    stored, so the result has a fresh RangeIndex.
+
+    Args:
+        path (str): The directory of the cache entry.
+
+    Returns:
+        tuple: The DataFrame and the dict of stored artifacts (empty if none).
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    features = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+    df = pd.DataFrame(features, columns=meta["float_columns"], copy=False)
+    for entry in meta["other_columns"]:
+        values = np.load(os.path.join(path, entry["file"]), mmap_mode="r")
+        if entry["categories"] is not None:
+            values = pd.Categorical.from_codes(values, entry["categories"])
+        df.insert(meta["columns"].index(entry["name"]), entry["name"], values)
+    artifacts_path = os.path.join(path, "artifacts.joblib")
+    artifacts = joblib.load(artifacts_path) if os.path.exists(artifacts_path) else {}
+    return df, artifacts
+
+
+def cached_frame(file_path, cache_dir, config, build):
+    """
+    Return a preprocessed DataFrame from the cache, building and storing it on a miss.
+
+    Args:
+        file_path (str): Path to the source CSV file.
+        cache_dir (str or None): Directory holding cache entries. None disables caching.
+        config (dict): The configuration the preprocessed data depends on.
+        build (callable): Returns the DataFrame and a dict of artifacts from scratch.
+
+    Returns:
+        tuple: The DataFrame and the dict of artifacts.
+    """
+    if cache_dir is None:
+        return build()
+    path = cache_path(file_path, cache_dir, config)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        df, artifacts = build()
+        save_frame(df, path, artifacts)
+    return load_frame(path)
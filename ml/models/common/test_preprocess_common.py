@@ -0,0 +1,93 @@
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import preprocess_common
+from preprocess_common import (
+    cache_path,
+    cached_frame,
+    group_train_test_split,
+    session_positions,
+)
+
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_model_preprocess(kind):
+    # Every model directory has a module named preprocess, so each is loaded by path
+    spec = importlib.util.spec_from_file_location(
+        f"{kind}_preprocess", os.path.join(MODELS_DIR, kind, "preprocess.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame(
+        {
+            "ID": np.repeat([1, 2, 3], 4),
+            "Activity": ["walking", "sitting"] * 6,
+            "Acc_X": np.arange(12, dtype=float),
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+def test_cached_frame_builds_once(tmp_path, data_path):
+    calls = []
+
+    def build():
+        calls.append(1)
+        df = pd.read_csv(data_path)
+        df["Activity"] = df["Activity"].astype("category")
+        return df, {"columns": list(df.columns)}
+
+    cache_dir = str(tmp_path / "cache")
+    expected, _ = build()
+    for _ in range(2):
+        df, artifacts = cached_frame(data_path, cache_dir, {"window_size": 20}, build)
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+        assert artifacts == {"columns": list(expected.columns)}
+    assert len(calls) == 2  # The direct call above and the first cache miss
+
+
+def test_cache_path_depends_on_content_and_config(tmp_path, data_path):
+    cache_dir = str(tmp_path / "cache")
+    path = cache_path(data_path, cache_dir, {"window_size": 20})
+    assert cache_path(data_path, cache_dir, {"window_size": 20}) == path
+    assert cache_path(data_path, cache_dir, {"window_size": 30}) != path
+    with open(data_path, "a") as f:
+        f.write("3,sitting,12.0\n")
+    assert cache_path(data_path, cache_dir, {"window_size": 20}) != path
+
+
+def test_session_positions_restart_at_every_session():
+    groups = [7, 7, 7, 3, 3, 7, 7]  # A group value seen again starts a new session
+    assert session_positions(groups).tolist() == [0, 1, 2, 0, 1, 0, 1]
+
+
+def test_split_keeps_groups_on_one_side(tmp_path):
+    groups = np.repeat(np.arange(20), 5)
+    split_path = str(tmp_path / "split.json")
+    train, test = group_train_test_split(groups, test_size=0.3, split_path=split_path)
+    assert len(np.intersect1d(groups[train], groups[test])) == 0
+    rows = np.sort(np.concatenate([train, test]))
+    assert np.array_equal(rows, np.arange(len(groups)))
+    assert len(np.unique(groups[test])) == 6
+
+    # A later call reuses the stored groups, even on other rows and with another seed
+    subset = groups[::2]
+    _, reused = group_train_test_split(subset, random_state=0, split_path=split_path)
+    assert set(subset[reused]) == set(groups[test])
+
+
+@pytest.mark.parametrize("kind", ["randomforest", "svm", "lstm"])
+def test_models_share_the_split_and_cache(kind):
+    module = load_model_preprocess(kind)
+    assert module.session_positions is preprocess_common.session_positions
+    assert module.group_train_test_split is preprocess_common.group_train_test_split
+    assert module.cached_frame is preprocess_common.cached_frame
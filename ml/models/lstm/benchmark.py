@@ -0,0 +1,121 @@
+import argparse
+import os
+import time
+import joblib
+import numpy as np
+import tensorflow as tf
+from keras.models import load_model
+from export_tflite import VARIANTS, representative_windows, tflite_path
+
+
+def percentiles(latencies):
+    return np.percentile(latencies, 50) * 1e3, np.percentile(latencies, 99) * 1e3
+
+
+def benchmark_keras(model, scaler, windows):
+    """
+    Score windows one at a time with the Keras model, scaling them in Python.
+
+    Args:
+        model (keras.Model): The trained model.
+        scaler (StandardScaler): The scaler fitted on the training sensor data.
+        windows (np.ndarray): Raw windows of shape (n_windows, window_size, n_features).
+
+    Returns:
+        tuple: Predicted class indices and per-window latencies in seconds.
+    """
+    predictions, latencies = [], []
+    for window in windows:
+        start = time.perf_counter()
+        scaled = scaler.transform(window).astype(np.float32)
+        probabilities = model.predict_on_batch(scaled[None])
+        predictions.append(int(np.argmax(probabilities)))
+        latencies.append(time.perf_counter() - start)
+    return np.array(predictions), np.array(latencies)
+
+
+def benchmark_tflite(path, windows, num_threads):
+    """
+    Score windows one at a time with a TFLite model on the CPU.
+
+    Args:
+        path (str): Path to the .tflite file.
+        windows (np.ndarray): Raw windows of shape (n_windows, window_size, n_features).
+        num_threads (int): Number of interpreter threads.
+
+    Returns:
+        tuple: Predicted class indices and per-window latencies in seconds.
+    """
+    interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]["index"]
+    output_index = interpreter.get_output_details()[0]["index"]
+    predictions, latencies = [], []
+    for window in windows:
+        start = time.perf_counter()
+        interpreter.set_tensor(input_index, window[None])
+        interpreter.invoke()
+        probabilities = interpreter.get_tensor(output_index)
+        predictions.append(int(np.argmax(probabilities)))
+        latencies.append(time.perf_counter() - start)
+    return np.array(predictions), np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Keras LSTM model against its quantized TFLite exports."
+    )
+    parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument("--model_path", type=str, default="lstm_activity_model.h5")
+    parser.add_argument("--scaler_path", type=str, default="scaler.joblib")
+    parser.add_argument(
+        "--label_encoder_path", type=str, default="label_encoder.joblib"
+    )
+    parser.add_argument("--tflite_dir", type=str, default=".")
+    parser.add_argument(
+        "--n_windows", type=int, default=1000, help="Number of test windows to score"
+    )
+    parser.add_argument("--num_threads", type=int, default=1)
+    parser.add_argument(
+        "--split_path",
+        type=str,
+        default=None,
+        help="JSON file holding the session train/test split",
+    )
+    args = parser.parse_args()
+
+    model = load_model(args.model_path, compile=False)
+    scaler = joblib.load(args.scaler_path)
+    le = joblib.load(args.label_encoder_path)
+    windows, labels = representative_windows(
+        args.data_path, args.n_windows, args.split_path, train=False
+    )
+    targets = le.transform(labels)
+
+    predictions, latencies = benchmark_keras(model, scaler, windows)
+    keras_accuracy = np.mean(predictions == targets)
+    p50, p99 = percentiles(latencies)
+    size = os.path.getsize(args.model_path) / 1e3
+    print(
+        f"{'model':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'size (KB)':>10} "
+        f"{'accuracy':>9} {'delta':>8} {'agreement':>10}"
+    )
+    print(
+        f"{'keras':>9} {p50:>9.3f} {p99:>9.3f} {size:>10.1f} "
+        f"{keras_accuracy:>9.4f} {0:>8.4f} {1:>10.4f}"
+    )
+    for variant in VARIANTS:
+        path = tflite_path(args.tflite_dir, variant)
+        variant_predictions, latencies = benchmark_tflite(path, windows, args.num_threads)
+        accuracy = np.mean(variant_predictions == targets)
+        agreement = np.mean(variant_predictions == predictions)
+        p50, p99 = percentiles(latencies)
+        size = os.path.getsize(path) / 1e3
+        print(
+            f"{variant:>9} {p50:>9.3f} {p99:>9.3f} {size:>10.1f} "
+            f"{accuracy:>9.4f} {accuracy - keras_accuracy:>8.4f} {agreement:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import os
+import joblib
+import keras
+import numpy as np
+import tensorflow as tf
+from keras.layers import Normalization
+from keras.models import load_model
+from model_tf import CONFIG, build_lstm_model
+from preprocess import load_data, create_sequences, split_window_starts
+
+# Post-training quantization variants written by export. Only full-integer quantization
+# needs the unrolled graph, which is about three times the size of the recurrent loop
+VARIANTS = ["float16", "int8", "int8_full"]
+UNROLLED_VARIANTS = {"int8_full"}
+
+
+def build_export_model(model, scaler, unroll=False):
+    """
+    Rebuild a trained model for TFLite conversion, with the scaler folded into the graph.
+
+    The exported model takes raw sensor windows: a Normalization layer holding the
+    scaler's mean and variance comes first, followed by a copy of the trained layers.
+    The recurrent loop converts to a compact TFLite WHILE op, which float16 and
+    dynamic-range int8 quantization support. Full-integer quantization crashes the
+    converter on that loop, so for it the layers are unrolled into plain fully connected
+    and elementwise ops, one copy of the cell per time step, at several times the size.
+
+    Args:
+        model (keras.Model): The trained model from build_lstm_model.
+        scaler (StandardScaler): The scaler fitted on the training sensor data.
+        unroll (bool): Whether to unroll the LSTM layers.
+
+    Returns:
+        keras.Model: A model with batch size 1 mapping raw windows to class probabilities.
+    """
+    input_shape = (CONFIG["window_size"], len(CONFIG["sensor_columns"]))
+    copy = build_lstm_model(
+        input_shape, model.output_shape[-1], batch_size=1, unroll=unroll
+    )
+    copy.set_weights(model.get_weights())
+
+    inputs = keras.Input(shape=input_shape, batch_size=1)
+    # scale_ rather than var_, so constant columns are left unscaled like in the scaler
+    x = Normalization(mean=scaler.mean_, variance=scaler.scale_**2)(inputs)
+    for layer in copy.layers:
+        x = layer(x)
+    return keras.Model(inputs, x)
+
+
+def representative_windows(data_path, n_windows, split_path=None, train=True, seed=0):
+    """
+    Sample raw (unscaled) sensor windows and their labels from one side of the split.
+
+    Args:
+        data_path (str): Path to the sensor data CSV file.
+        n_windows (int, optional): Number of windows to sample; None for all of them.
+        split_path (str, optional): JSON file holding the session train/test split.
+        train (bool): Whether to sample training windows, else test windows.
+        seed (int): Seed for the sampling.
+
+    Returns:
+        tuple: Float32 windows of shape (n_windows, window_size, n_features) and the
+            activity label of each window.
+    """
+    df = load_data(data_path)
+    train_starts, test_starts = split_window_starts(df, split_path)
+    starts = train_starts if train else test_starts
+    if n_windows is not None and n_windows < len(starts):
+        rng = np.random.default_rng(seed)
+        starts = np.sort(rng.choice(starts, n_windows, replace=False))
+    windows, labels = create_sequences(
+        df, CONFIG["window_size"], CONFIG["step_size"], CONFIG["sensor_columns"], starts
+    )
+    return windows.astype(np.float32), np.asarray(labels)
+
+
+def convert(export_model, variant, calibration_windows=None):
+    """
+    Convert a model to TFLite with post-training quantization.
+
+    Args:
+        export_model (keras.Model): The model from build_export_model.
+        variant (str): "float32" (no quantization), "float16" (float16 weights), "int8"
+            (dynamic-range: int8 weights, float activations) or "int8_full" (int8 weights
+            and activations, with float input and output; needs an unrolled model).
+        calibration_windows (np.ndarray, optional): Raw windows used to calibrate the
+            activation ranges; required for "int8_full".
+
+    Returns:
+        bytes: The TFLite flatbuffer.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(export_model)
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == "int8_full":
+        if calibration_windows is None:
+            raise ValueError("Full int8 quantization needs calibration windows")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: (
+            [window[None]] for window in calibration_windows
+        )
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif variant != "float32":
+        raise ValueError(f"Unsupported TFLite variant: {variant}")
+    return converter.convert()
+
+
+def tflite_path(output_dir, variant):
+    return os.path.join(output_dir, f"lstm_activity_model_{variant}.tflite")
+
+
+def export(
+    data_path,
+    model_path="lstm_activity_model.h5",
+    scaler_path="scaler.joblib",
+    output_dir=".",
+    n_calibration=200,
+    split_path=None,
+):
+    """
+    Write the float16, int8 and int8_full TFLite variants of a trained model.
+
+    Args:
+        data_path (str): Path to the sensor data CSV file, for the calibration windows.
+        model_path (str): Path to the saved Keras model.
+        scaler_path (str): Path to the saved scaler.
+        output_dir (str): Directory to write the .tflite files to.
+        n_calibration (int): Number of training windows used to calibrate int8_full ranges.
+        split_path (str, optional): JSON file holding the session train/test split, so
+            calibration only uses training sessions.
+
+    Returns:
+        dict: The path of every written variant.
+    """
+    model = load_model(model_path, compile=False)
+    scaler = joblib.load(scaler_path)
+    export_models = {
+        unroll: build_export_model(model, scaler, unroll) for unroll in (False, True)
+    }
+    calibration_windows, _ = representative_windows(data_path, n_calibration, split_path)
+    paths = {}
+    for variant in VARIANTS:
+        export_model = export_models[variant in UNROLLED_VARIANTS]
+        paths[variant] = tflite_path(output_dir, variant)
+        with open(paths[variant], "wb") as f:
+            f.write(convert(export_model, variant, calibration_windows))
+        print(f"Wrote {paths[variant]} ({os.path.getsize(paths[variant]) / 1e3:.1f} KB)")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the LSTM model as quantized TFLite models."
+    )
+    parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument("--model_path", type=str, default="lstm_activity_model.h5")
+    parser.add_argument("--scaler_path", type=str, default="scaler.joblib")
+    parser.add_argument("--output_dir", type=str, default=".")
+    parser.add_argument(
+        "--n_calibration",
+        type=int,
+        default=200,
+        help="Number of training windows used to calibrate the int8_full model",
+    )
+    parser.add_argument(
+        "--split_path",
+        type=str,
+        default=None,
+        help="JSON file holding the session train/test split",
+    )
+    args = parser.parse_args()
+    export(
+        args.data_path,
+        args.model_path,
+        args.scaler_path,
+        args.output_dir,
+        args.n_calibration,
+        args.split_path,
+    )
@@ -1,65 +1,38 @@
 import numpy as np
-import pandas as pd
 import tensorflow as tf
-from keras.layers import LSTM, Dense, Dropout, Sequential
+from keras.layers import LSTM, Dense, Dropout, Input
+from keras.models import Sequential
 from keras.optimizers import Adam
 from keras.utils import to_categorical
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
 import argparse
 import joblib  # For saving preprocessing objects
+from preprocess import CONFIG as PREPROCESS_CONFIG
+from preprocess import prepare_data, create_sequences, split_window_starts
+from preprocess_common import cache_path  # On sys.path once preprocess is imported
 
+# Preprocessing settings come from preprocess, so the training windows and the session
+# split always agree; only the training settings are added here
 CONFIG = {
-    "sensor_columns": [
-        "Acc_X",
-        "Acc_Y",
-        "Acc_Z",
-        "Gyro_X",
-        "Gyro_Y",
-        "Gyro_Z",
-        "Mag_X",
-        "Mag_Y",
-        "Mag_Z",
-    ],
-    "window_size": 20,
-    "step_size": 10,
-    "test_size": 0.3,
+    **PREPROCESS_CONFIG,
+    "batch_size": 64,
+    "epochs": 20,
 }
 
 
-# Preprocessing functions
-def load_data(file_path):
-    df = pd.read_csv(file_path)
-    return df
-
-
-# Scale features using StandardScaler
-def scale_features(df, columns):
-    scaler = StandardScaler()
-    df[columns] = scaler.fit_transform(df[columns])
-    return df, scaler
-
-
-# Create sequences of sensor data
-def create_sequences(df, window_size, step_size, columns):
-    sequences = []
-    labels = []
-    for start in range(0, len(df) - window_size, step_size):
-        end = start + window_size
-        seq = df[columns][start:end].to_numpy()
-        label = df["Activity"][end - 1]
-        sequences.append(seq)
-        labels.append(label)
-    return np.array(sequences), np.array(labels)
-
-
 # LSTM Model function
-def build_lstm_model(input_shape, num_classes):
+def build_lstm_model(
+    input_shape, num_classes, batch_size=None, stateful=False, unroll=False
+):
+    # A stateful model carries its hidden state across calls and needs a fixed batch size,
+    # one state row per stream; an unrolled model replaces the recurrent loop by one copy
+    # of the cell per time step, for full-integer TFLite export. The layers and weights are
+    # the same either way
     model = Sequential(
         [
-            LSTM(64, return_sequences=True, input_shape=input_shape),
+            Input(shape=input_shape, batch_size=batch_size),
+            LSTM(64, return_sequences=True, stateful=stateful, unroll=unroll),
             Dropout(0.5),
-            LSTM(32),
+            LSTM(32, stateful=stateful, unroll=unroll),
             Dropout(0.5),
             Dense(32, activation="relu"),
             Dense(num_classes, activation="softmax"),
@@ -73,17 +46,130 @@ def build_lstm_model(input_shape, num_classes):
     return model
 
 
-def main(data_path):
-    # Load and preprocess data
-    df = load_data(data_path)
-    df, scaler = scale_features(df, CONFIG["sensor_columns"])
-    le = LabelEncoder()
-    df["Activity"] = le.fit_transform(df["Activity"])
-    sequences, labels = create_sequences(
-        df, CONFIG["window_size"], CONFIG["step_size"], CONFIG["sensor_columns"]
+# Streaming input pipeline over a (memory-mapped) sensor array
+def make_window_dataset(
+    values, labels, starts, window_size, num_classes, batch_size, shuffle=False, cache=None
+):
+    """
+    Build a tf.data pipeline that cuts windows out of the sensor array batch by batch.
+
+    Only window start offsets are held by the dataset; each batch of windows is gathered
+    from values on demand, so values can be a memory-mapped array larger than RAM. Batches
+    are assembled by parallel map calls and prefetched while the model trains.
+
+    Args:
+        values (np.ndarray): Scaled sensor readings of shape (n_samples, n_features).
+        labels (np.ndarray): Integer class label of every row.
+        starts (np.ndarray): First row of each window to serve.
+        window_size (int): Number of time steps per window.
+        num_classes (int): Number of classes for the one-hot targets.
+        batch_size (int): Number of windows per batch.
+        shuffle (bool): Whether to reshuffle the windows every epoch.
+        cache (str, optional): Cache the assembled batches: "" in memory, otherwise in
+            files with this prefix. Only useful for a dataset that is not shuffled.
+
+    Returns:
+        tf.data.Dataset: Batches of (windows, one-hot labels).
+    """
+    offsets = np.arange(window_size)
+
+    def gather(batch_starts):
+        windows = values[batch_starts[:, None] + offsets]
+        return windows.astype(np.float32), labels[batch_starts + window_size - 1]
+
+    def load(batch_starts):
+        windows, targets = tf.numpy_function(
+            gather, [batch_starts], (tf.float32, labels.dtype)
+        )
+        windows.set_shape((None, window_size, values.shape[1]))
+        targets.set_shape((None,))
+        return windows, tf.one_hot(targets, num_classes)
+
+    dataset = tf.data.Dataset.from_tensor_slices(starts)
+    if shuffle:
+        dataset = dataset.shuffle(len(starts), reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(
+        load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle
+    )
+    if cache is not None:
+        dataset = dataset.cache(cache)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def train_streaming(df, train_starts, test_starts, val_cache=None):
+    """
+    Train the LSTM from tf.data pipelines instead of in-memory sequence arrays.
+
+    Args:
+        df (pd.DataFrame): Scaled, label-encoded sensor data from prepare_data.
+        train_starts (np.ndarray): First row of each training window.
+        test_starts (np.ndarray): First row of each validation window.
+        val_cache (str, optional): File prefix under which validation batches are cached
+            after the first epoch.
+
+    Returns:
+        keras.Model: The trained model.
+    """
+    window_size = CONFIG["window_size"]
+    # With a cache_dir this is a view of the memory-mapped cache entry
+    values = df[CONFIG["sensor_columns"]].to_numpy()
+    labels = df["Activity"].to_numpy()
+
+    num_classes = len(np.unique(labels[train_starts + window_size - 1]))
+    train_ds = make_window_dataset(
+        values,
+        labels,
+        train_starts,
+        window_size,
+        num_classes,
+        CONFIG["batch_size"],
+        shuffle=True,
+    )
+    val_ds = make_window_dataset(
+        values,
+        labels,
+        test_starts,
+        window_size,
+        num_classes,
+        CONFIG["batch_size"],
+        cache=val_cache,
+    )
+
+    input_shape = (window_size, len(CONFIG["sensor_columns"]))
+    model = build_lstm_model(input_shape, num_classes)
+    model.fit(train_ds, epochs=CONFIG["epochs"], validation_data=val_ds)
+    return model
+
+
+def main(data_path, cache_dir=None, streaming=False, split_path=None):
+    # Load and preprocess data, reusing the cached scaled data when available
+    df, scaler, le = prepare_data(data_path, cache_dir)
+    # Session-bounded windows, with whole sessions held out for testing
+    train_starts, test_starts = split_window_starts(df, split_path)
+    if streaming:
+        # Validation batches depend on the data, the whole CONFIG and the held-out sessions
+        val_cache = None
+        if cache_dir is not None:
+            test_groups = np.unique(df[CONFIG["group_column"]].to_numpy()[test_starts])
+            key = {**CONFIG, "test_groups": test_groups.tolist()}
+            val_cache = cache_path(data_path, cache_dir, key) + "_validation"
+        model = train_streaming(df, train_starts, test_starts, val_cache)
+        save_artifacts(model, scaler, le)
+        return
+
+    X_train, y_train = create_sequences(
+        df,
+        CONFIG["window_size"],
+        CONFIG["step_size"],
+        CONFIG["sensor_columns"],
+        train_starts,
     )
-    X_train, X_test, y_train, y_test = train_test_split(
-        sequences, labels, test_size=CONFIG["test_size"], random_state=42
+    X_test, y_test = create_sequences(
+        df,
+        CONFIG["window_size"],
+        CONFIG["step_size"],
+        CONFIG["sensor_columns"],
+        test_starts,
     )
 
     # Convert labels to one-hot encoding
@@ -97,11 +183,14 @@ def main(data_path):
     model.fit(
         X_train,
         y_train_oh,
-        epochs=20,
-        batch_size=64,
+        epochs=CONFIG["epochs"],
+        batch_size=CONFIG["batch_size"],
         validation_data=(X_test, y_test_oh),
     )
+    save_artifacts(model, scaler, le)
 
+
+def save_artifacts(model, scaler, le):
     # Save the LSTM model and preprocessing objects
     model.save("lstm_activity_model.h5")
     joblib.dump(scaler, "scaler.joblib")
@@ -115,5 +204,23 @@ if __name__ == "__main__":
         description="Train an LSTM model for activity recognition."
     )
     parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Cache scaled sensor data here and reuse it on later runs",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Feed training through a tf.data pipeline over the sensor array",
+    )
+    parser.add_argument(
+        "--split_path",
+        type=str,
+        default=None,
+        help="JSON file holding the session train/test split, created if missing "
+        "and shared with the other models",
+    )
     args = parser.parse_args()
-    main(args.data_path)
+    main(args.data_path, args.cache_dir, args.streaming, args.split_path)
@@ -1,8 +1,15 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 import argparse
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
+
+# Code shared by the model directories, which import their own modules flat
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(MODELS_DIR, "common"))
+from preprocess_common import cached_frame, group_train_test_split, session_positions
 
 CONFIG = {
     "sensor_columns": [
@@ -19,60 +26,142 @@ CONFIG = {
     "window_size": 20,  # Number of time steps in each sequence
     "step_size": 10,  # Steps to move ahead in each iteration (for overlap)
     "test_size": 0.3,  # Test set size
+    "group_column": "ID",  # Session identifier; windows never cross its boundaries
+}
+
+# Explicit column dtypes so large files are not parsed as float64/object
+DTYPES = {
+    **{col: "float32" for col in CONFIG["sensor_columns"]},
+    "Barometer": "float32",
+    "Pedometer": "float32",
+    "ID": "int32",
+    "Activity": "category",
 }
 
 
-def load_data(file_path):
-    """Load sensor data from a CSV file."""
+def load_data(file_path, chunksize=None):
+    """Load sensor data from a CSV file, as an iterator of chunks if chunksize is given."""
     try:
-        df = pd.read_csv(file_path)
-        return df
+        return pd.read_csv(file_path, dtype=DTYPES, chunksize=chunksize)
     except Exception as e:
         print(f"Error loading the data: {e}")
         raise
 
 
 def scale_features(df, columns):
-    """Scale features using standard scaling."""
+    """Scale features using standard scaling, returning the DataFrame and the fitted scaler."""
     scaler = StandardScaler()
     df[columns] = scaler.fit_transform(df[columns])
-    return df
+    return df, scaler
 
 
-def create_sequences(df, window_size, step_size, columns):
+def window_starts(df, window_size, step_size, group_column=None):
+    """
+    Return the first row of every window, stepping from the start of each session.
+
+    With a group_column, only windows lying entirely within one run of consecutive equal
+    group values are kept, so no window spans two sessions.
+    """
+    if group_column is None:
+        return np.arange(0, max(len(df) - window_size, 0), step_size)
+    positions = session_positions(df[group_column])
+    n_windows = max(len(df) - window_size + 1, 0)
+    starts = np.flatnonzero(positions[:n_windows] % step_size == 0)
+    # Positions count up by one within a session, so a window stays within its session
+    # exactly when its last row is window_size - 1 positions past its first
+    last = positions[starts + window_size - 1]
+    return starts[last - positions[starts] == window_size - 1]
+
+
+def create_sequences(df, window_size, step_size, columns, starts=None):
     """
     Create sequences from the time series data.
+
+    Returns a read-only strided view of shape (n_windows, window_size, n_columns) over the
+    sensor values, so no window is copied, and the label of the last row of each window.
+    If starts is given (e.g. from window_starts), only those windows are gathered, as a copy.
     """
-    sequences = []
-    labels = []
-    for start in range(0, len(df) - window_size, step_size):
-        end = start + window_size
-        seq = df[columns][start:end].to_numpy()
-        # Use the label (activity) of the last row in the window
-        label = df["Activity"][end - 1]
-        sequences.append(seq)
-        labels.append(label)
-    return np.array(sequences), np.array(labels)
-
-
-def preprocess_data_for_lstm(file_path):
+    values = df[columns].to_numpy()
+    if starts is not None:
+        if len(starts) == 0:
+            return np.empty((0, window_size, len(columns)), values.dtype), np.empty(0)
+        windows = sliding_window_view(values, window_size, axis=0)[starts]
+        labels = df["Activity"].to_numpy()[starts + window_size - 1]
+        return windows.transpose(0, 2, 1), labels
+    starts = np.arange(0, max(len(df) - window_size, 0), step_size)
+    if len(starts) == 0:
+        return np.empty((0, window_size, len(columns)), values.dtype), np.empty(0)
+    # (n_windows, n_columns, window_size) view; transposing to time-major keeps it a view
+    windows = sliding_window_view(values, window_size, axis=0)[::step_size]
+    windows = windows[: len(starts)].transpose(0, 2, 1)
+    # Use the label (activity) of the last row in each window
+    labels = df["Activity"].to_numpy()[starts + window_size - 1]
+    return windows, labels
+
+
+def split_window_starts(df, split_path=None):
+    """Return (train_starts, test_starts) of the session-bounded windows, split by session."""
+    group_column = CONFIG["group_column"]
+    starts = window_starts(df, CONFIG["window_size"], CONFIG["step_size"], group_column)
+    train, test = group_train_test_split(
+        df[group_column].to_numpy()[starts],
+        test_size=CONFIG["test_size"],
+        random_state=42,
+        split_path=split_path,
+    )
+    return starts[train], starts[test]
+
+
+def prepare_data(file_path, cache_dir=None):
     """
-    Full preprocessing pipeline transforming raw CSV data into sequences ready for LSTM.
+    Load, scale and label-encode sensor data, returning (df, scaler, label_encoder).
+
+    The result only depends on the file, the sensor columns and the group column, so it is
+    cached under that key when cache_dir is given and shared by every windowing and training
+    configuration.
     """
-    df = load_data(file_path)
-    df = scale_features(df, CONFIG["sensor_columns"])
 
-    # Convert labels to integers
-    le = LabelEncoder()
-    df["Activity"] = le.fit_transform(df["Activity"])
+    def build():
+        df = load_data(file_path)
+        df, scaler = scale_features(df, CONFIG["sensor_columns"])
+        # Convert labels to integers
+        le = LabelEncoder()
+        df["Activity"] = le.fit_transform(df["Activity"])
+        df = df[[CONFIG["group_column"], "Activity"] + CONFIG["sensor_columns"]]
+        return df, {"scaler": scaler, "label_encoder": le}
 
-    sequences, labels = create_sequences(
-        df, CONFIG["window_size"], CONFIG["step_size"], CONFIG["sensor_columns"]
-    )
+    config = {
+        "sensor_columns": CONFIG["sensor_columns"],
+        "group_column": CONFIG["group_column"],
+    }
+    df, artifacts = cached_frame(file_path, cache_dir, config, build)
+    return df, artifacts["scaler"], artifacts["label_encoder"]
+
+
+def preprocess_data_for_lstm(file_path, cache_dir=None, split_path=None):
+    """
+    Full preprocessing pipeline transforming raw CSV data into sequences ready for LSTM.
 
-    # Split the sequences and labels into training and testing datasets
-    X_train, X_test, y_train, y_test = train_test_split(
-        sequences, labels, test_size=CONFIG["test_size"], random_state=42
+    Windows never span two sessions, and whole sessions are assigned to either the training
+    or the test set, optionally reusing the split stored in split_path.
+    """
+    df, _, le = prepare_data(file_path, cache_dir)
+    train_starts, test_starts = split_window_starts(df, split_path)
+
+    # Gather the training and testing sequences and labels directly from the split
+    X_train, y_train = create_sequences(
+        df,
+        CONFIG["window_size"],
+        CONFIG["step_size"],
+        CONFIG["sensor_columns"],
+        train_starts,
+    )
+    X_test, y_test = create_sequences(
+        df,
+        CONFIG["window_size"],
+        CONFIG["step_size"],
+        CONFIG["sensor_columns"],
+        test_starts,
     )
 
     return X_train, X_test, y_train, y_test, le.classes_
@@ -83,11 +172,24 @@ if __name__ == "__main__":
         description="Preprocess sensor data for LSTM model training."
     )
     parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Cache scaled sensor data here and reuse it on later runs",
+    )
+    parser.add_argument(
+        "--split_path",
+        type=str,
+        default=None,
+        help="JSON file holding the session train/test split, created if missing "
+        "and shared with the other models",
+    )
     args = parser.parse_args()
 
     # Preprocess the data
     X_train, X_test, y_train, y_test, class_names = preprocess_data_for_lstm(
-        args.data_path
+        args.data_path, args.cache_dir, args.split_path
     )
 
     print("Preprocessing complete. Data ready for LSTM model.")
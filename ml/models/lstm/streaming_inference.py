@@ -0,0 +1,250 @@
+import argparse
+import time
+import joblib
+import numpy as np
+from keras.models import load_model
+from model_tf import CONFIG, build_lstm_model
+from preprocess import load_data
+
+
+class StreamingLSTM:
+    """
+    Stateful LSTM scoring for a fleet of devices streaming sensor samples in chunks.
+
+    The trained weights are copied into a stateful copy of build_lstm_model with one batch
+    row per device. Each call feeds the next chunk of every device and the hidden state is
+    kept until the following call, so every sample passes through the LSTM once instead
+    of once per overlapping window, and the whole fleet is scored by one model call.
+    """
+
+    def __init__(self, model, scaler, label_encoder, n_devices):
+        """
+        Args:
+            model (keras.Model): The trained model from build_lstm_model.
+            scaler (StandardScaler): The scaler fitted on the training sensor data.
+            label_encoder (LabelEncoder): The encoder of the activity labels.
+            n_devices (int): The number of concurrent device streams.
+        """
+        self.scaler = scaler
+        # The standardization is applied directly, in float32, on every update
+        self.mean = scaler.mean_.astype(np.float32)
+        self.scale = scaler.scale_.astype(np.float32)
+        self.label_encoder = label_encoder
+        self.n_devices = n_devices
+        self.n_features = len(CONFIG["sensor_columns"])
+        self.model = build_lstm_model(
+            (None, self.n_features),
+            model.output_shape[-1],
+            batch_size=n_devices,
+            stateful=True,
+        )
+        self.model.set_weights(model.get_weights())
+        self.recurrent = [
+            layer for layer in self.model.layers if getattr(layer, "stateful", False)
+        ]
+        # Session of the last chunk of every device, to detect session boundaries
+        self.sessions = np.full(n_devices, None, dtype=object)
+
+    @classmethod
+    def from_artifacts(
+        cls,
+        n_devices,
+        model_path="lstm_activity_model.h5",
+        scaler_path="scaler.joblib",
+        label_encoder_path="label_encoder.joblib",
+    ):
+        """
+        Load the artifacts written by model_tf.save_artifacts.
+
+        Args:
+            n_devices (int): The number of concurrent device streams.
+            model_path (str): Path to the saved Keras model.
+            scaler_path (str): Path to the saved scaler.
+            label_encoder_path (str): Path to the saved label encoder.
+
+        Returns:
+            StreamingLSTM: The streaming scorer.
+        """
+        model = load_model(model_path, compile=False)
+        return cls(
+            model, joblib.load(scaler_path), joblib.load(label_encoder_path), n_devices
+        )
+
+    def reset(self, devices=None):
+        """
+        Clear the hidden state of some devices, or of all of them.
+
+        Args:
+            devices (np.ndarray, optional): Boolean mask or indices of the devices to reset.
+        """
+        if devices is None:
+            for layer in self.recurrent:
+                layer.reset_state()
+            self.sessions[:] = None
+            return
+        for layer in self.recurrent:
+            for state in layer.states:
+                values = np.array(state.numpy())
+                values[devices] = 0.0
+                state.assign(values)
+        self.sessions[devices] = None
+
+    def update(self, chunk, sessions=None, active=None):
+        """
+        Feed the next chunk of readings of every device and return class probabilities.
+
+        Args:
+            chunk (np.ndarray): Raw sensor readings of shape (n_devices, chunk_size,
+                n_features), in CONFIG["sensor_columns"] order.
+            sessions (np.ndarray, optional): The session ID of every device's chunk. The
+                state of a device is reset whenever its session differs from the last one.
+            active (np.ndarray, optional): Boolean mask of the devices that sent data; the
+                state of the other devices is left untouched and their rows are NaN.
+
+        Returns:
+            np.ndarray: Class probabilities of shape (n_devices, n_classes), given the
+                whole session history of every device.
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.shape[0] != self.n_devices or chunk.shape[2] != self.n_features:
+            raise ValueError(
+                f"Expected chunks of shape ({self.n_devices}, chunk_size, {self.n_features})"
+            )
+        if active is not None:
+            active = np.asarray(active, dtype=bool)
+        if sessions is not None:
+            sessions = np.asarray(sessions, dtype=object)
+            changed = sessions != self.sessions
+            if active is not None:
+                changed &= active
+            if changed.any():
+                self.reset(changed)
+            self.sessions[changed] = sessions[changed]
+
+        # The model advances every row, so the state of idle devices is put back afterwards
+        states = [state for layer in self.recurrent for state in layer.states]
+        saved = None
+        if active is not None and not np.all(active):
+            saved = [np.array(state.numpy()) for state in states]
+
+        scaled = (np.asarray(chunk, dtype=np.float32) - self.mean) / self.scale
+        probabilities = np.array(self.model.predict_on_batch(scaled))
+
+        if saved is not None:
+            for state, values in zip(states, saved):
+                current = np.array(state.numpy())
+                current[~active] = values[~active]
+                state.assign(current)
+            probabilities[~active] = np.nan
+        return probabilities
+
+    def predict(self, chunk, sessions=None, active=None):
+        """
+        Feed the next chunk of every device and return the predicted activity labels.
+
+        Args:
+            chunk (np.ndarray): Raw sensor readings of shape (n_devices, chunk_size, n_features).
+            sessions (np.ndarray, optional): The session ID of every device's chunk.
+            active (np.ndarray, optional): Boolean mask of the devices that sent data.
+
+        Returns:
+            np.ndarray: The predicted label of every device; None for idle devices.
+        """
+        probabilities = self.update(chunk, sessions, active)
+        labels = np.full(self.n_devices, None, dtype=object)
+        rows = np.ones(self.n_devices, bool) if active is None else np.asarray(active, bool)
+        labels[rows] = self.label_encoder.inverse_transform(
+            probabilities[rows].argmax(axis=1)
+        )
+        return labels
+
+
+def device_streams(df, n_devices, chunk_size):
+    """
+    Deal the sessions of a recording out to devices and cut them into chunks.
+
+    Sessions are assigned round-robin and trimmed to whole chunks, so no chunk spans two
+    sessions.
+
+    Args:
+        df (pd.DataFrame): Sensor data with an ID column.
+        n_devices (int): The number of simulated devices.
+        chunk_size (int): The number of samples per chunk.
+
+    Returns:
+        list: For every device, a list of (session ID, chunk) pairs in stream order.
+    """
+    values = df[CONFIG["sensor_columns"]].to_numpy(dtype=np.float32)
+    ids = df[CONFIG["group_column"]].to_numpy()
+    bounds = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1], True])
+    streams = [[] for _ in range(n_devices)]
+    for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        n_chunks = (stop - start) // chunk_size
+        session = values[start : start + n_chunks * chunk_size]
+        chunks = session.reshape(n_chunks, chunk_size, -1)
+        streams[i % n_devices].extend((ids[start], chunk) for chunk in chunks)
+    return streams
+
+
+def replay(streamer, streams, chunk_size):
+    """
+    Score device streams in lockstep ticks, one model call per tick.
+
+    Args:
+        streamer (StreamingLSTM): The streaming scorer.
+        streams (list): Per-device (session ID, chunk) pairs from device_streams.
+        chunk_size (int): The number of samples per chunk.
+
+    Returns:
+        tuple: The number of scored samples and the elapsed seconds.
+    """
+    n_devices = streamer.n_devices
+    n_features = streamer.n_features
+    n_ticks = max(len(stream) for stream in streams)
+    n_samples = 0
+    start = time.perf_counter()
+    for tick in range(n_ticks):
+        chunk = np.zeros((n_devices, chunk_size, n_features), dtype=np.float32)
+        sessions = np.full(n_devices, None, dtype=object)
+        active = np.zeros(n_devices, bool)
+        for device, stream in enumerate(streams):
+            if tick < len(stream):
+                sessions[device], chunk[device] = stream[tick]
+                active[device] = True
+        streamer.update(chunk, sessions, active)
+        n_samples += active.sum() * chunk_size
+    return n_samples, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a sensor recording through stateful streaming LSTM inference."
+    )
+    parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument("--n_devices", type=int, default=32)
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=CONFIG["step_size"],
+        help="Samples fed per device per call",
+    )
+    parser.add_argument("--model_path", type=str, default="lstm_activity_model.h5")
+    parser.add_argument("--scaler_path", type=str, default="scaler.joblib")
+    parser.add_argument(
+        "--label_encoder_path", type=str, default="label_encoder.joblib"
+    )
+    args = parser.parse_args()
+
+    streamer = StreamingLSTM.from_artifacts(
+        args.n_devices, args.model_path, args.scaler_path, args.label_encoder_path
+    )
+    streams = device_streams(load_data(args.data_path), args.n_devices, args.chunk_size)
+    n_samples, elapsed = replay(streamer, streams, args.chunk_size)
+    print(
+        f"Scored {n_samples} samples from {args.n_devices} devices in {elapsed:.2f}s "
+        f"({n_samples / elapsed:.0f} samples/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
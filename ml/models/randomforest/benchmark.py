@@ -0,0 +1,258 @@
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from model import DecisionTree, SimpleRandomForest
+from preprocess import CONFIG, compute_rolling_features
+
+
+def legacy_find_best_split(X, y, feature_indices):
+    """
+    Reference copy of the original per-value split search, kept for comparison.
+
+    Args:
+        X (np.ndarray): The feature matrix for the dataset.
+        y (np.ndarray): The array of class labels for the dataset.
+        feature_indices (list of int): Indices of features to consider for splitting.
+
+    Returns:
+        tuple: The best feature index and the value to split at.
+    """
+    best_feature, best_value, best_gain = None, None, 0
+    for feature in feature_indices:
+        for value in set(X[:, feature]):
+            left_indices = [i for i in range(len(X)) if X[i, feature] <= value]
+            right_indices = [i for i in range(len(X)) if X[i, feature] > value]
+            if not left_indices or not right_indices:
+                continue
+            gain = DecisionTree.gini_gain(y, left_indices, right_indices)
+            if gain > best_gain:
+                best_feature, best_value, best_gain = feature, value, gain
+    return best_feature, best_value
+
+
+def make_dataset(n_samples, n_features=9, n_classes=3, seed=0):
+    """
+    Generate a synthetic sensor-like classification dataset.
+
+    Args:
+        n_samples (int): Number of rows to generate.
+        n_features (int): Number of feature columns.
+        n_classes (int): Number of activity classes.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        tuple: Feature matrix and integer class labels.
+    """
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, n_classes, size=n_samples)
+    X = rng.normal(size=(n_samples, n_features)) + y[:, None] * 0.5
+    return X, y
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark_split(sizes, legacy_limit):
+    """
+    Compare the sort-based split search against the original implementation.
+
+    Args:
+        sizes (list of int): Dataset sizes to benchmark.
+        legacy_limit (int): Largest size on which the legacy search is still run.
+    """
+    tree = DecisionTree()
+    print(f"{'n_samples':>10} {'vectorized (s)':>15} {'legacy (s)':>12} {'speedup':>9} match")
+    for n_samples in sizes:
+        X, y = make_dataset(n_samples)
+        features = list(range(X.shape[1]))
+        (feature, value, _), fast = time_call(tree.find_best_split, X, y, features)
+        if n_samples > legacy_limit:
+            print(f"{n_samples:>10} {fast:>15.4f} {'-':>12} {'-':>9} -")
+            continue
+        (legacy_feature, legacy_value), slow = time_call(
+            legacy_find_best_split, X, y, features
+        )
+        match = feature == legacy_feature and value == legacy_value
+        print(f"{n_samples:>10} {fast:>15.4f} {slow:>12.4f} {slow / fast:>9.1f} {match}")
+
+
+def benchmark_fit(sizes, n_estimators, max_depth, max_bins):
+    """
+    Compare exact and histogram-binned forest training time across dataset sizes.
+
+    Args:
+        sizes (list of int): Dataset sizes to benchmark.
+        n_estimators (int): The number of trees in the forest.
+        max_depth (int): The maximum depth of each tree.
+        max_bins (int): The number of bins used in binned mode.
+    """
+    print(f"{'n_samples':>10} {'exact (s)':>10} {'binned (s)':>11} {'X (MB)':>8} {'binned X (MB)':>14}")
+    for n_samples in sizes:
+        X, y = make_dataset(n_samples)
+        exact = SimpleRandomForest(n_estimators=n_estimators, max_depth=max_depth)
+        binned = SimpleRandomForest(
+            n_estimators=n_estimators, max_depth=max_depth, max_bins=max_bins
+        )
+        _, exact_time = time_call(exact.fit, X, y)
+        _, binned_time = time_call(binned.fit, X, y)
+        print(
+            f"{n_samples:>10} {exact_time:>10.3f} {binned_time:>11.3f} "
+            f"{X.nbytes / 1e6:>8.1f} {X.size / 1e6:>14.1f}"
+        )
+
+
+def legacy_rolling_features(df, columns, window_size):
+    """
+    Reference copy of the original pandas rolling feature loop, kept for comparison.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the sensor data.
+        columns (list of str): List of column names to calculate rolling features for.
+        window_size (int): The number of observations used for calculating the rolling statistics.
+
+    Returns:
+        pd.DataFrame: The DataFrame with added rolling window features, NaN rows kept.
+    """
+    for col in columns:
+        df[f"{col}_rolling_mean"] = df[col].rolling(window=window_size).mean()
+        df[f"{col}_rolling_std"] = df[col].rolling(window=window_size).std()
+        df[f"{col}_rolling_min"] = df[col].rolling(window=window_size).min()
+        df[f"{col}_rolling_max"] = df[col].rolling(window=window_size).max()
+        df[f"{col}_diff"] = df[col].diff()
+        df[f"{col}_diff2"] = df[col].diff().diff()
+    return df
+
+
+def benchmark_rolling(sizes, legacy_limit, window_size):
+    """
+    Compare the single-pass NumPy rolling engine against the pandas implementation.
+
+    Args:
+        sizes (list of int): Numbers of rows to benchmark.
+        legacy_limit (int): Largest size on which the pandas path is still run.
+        window_size (int): The rolling window size.
+    """
+    columns = CONFIG["sensor_columns"]
+    print(f"{'n_rows':>10} {'numpy (s)':>10} {'pandas (s)':>11} {'speedup':>9} {'max abs err':>12}")
+    for n_rows in sizes:
+        values, _ = make_dataset(n_rows, n_features=len(columns))
+        features, fast = time_call(compute_rolling_features, values, window_size)
+        if n_rows > legacy_limit:
+            print(f"{n_rows:>10} {fast:>10.3f} {'-':>11} {'-':>9} {'-':>12}")
+            continue
+        df = pd.DataFrame(values, columns=columns)
+        legacy, slow = time_call(legacy_rolling_features, df, columns, window_size)
+        error = np.nanmax(np.abs(legacy.drop(columns=columns).to_numpy() - features))
+        print(f"{n_rows:>10} {fast:>10.3f} {slow:>11.3f} {slow / fast:>9.1f} {error:>12.2e}")
+
+
+def benchmark_load(n_samples, n_estimators, max_depth):
+    """
+    Compare loading a pickled forest against the memory-mapped flat forest format.
+
+    Args:
+        n_samples (int): The number of training rows, which drives the tree sizes.
+        n_estimators (int): The number of trees in the forest.
+        max_depth (int): The maximum depth of each tree.
+    """
+    X, y = make_dataset(n_samples)
+    forest = SimpleRandomForest(
+        n_estimators=n_estimators, max_depth=max_depth, max_bins=255, random_state=0
+    )
+    forest.fit(X, y)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_path = os.path.join(tmp_dir, "forest.pkl")
+        flat_path = os.path.join(tmp_dir, "forest.srf")
+        with open(pickle_path, "wb") as file:
+            pickle.dump(forest, file)
+        forest.save(flat_path)
+
+        def load_pickle():
+            with open(pickle_path, "rb") as file:
+                return pickle.load(file)
+
+        expected = forest.predict(X)
+        print(f"{'format':>8} {'size (MB)':>10} {'load (ms)':>10} match")
+        for name, path, load in (
+            ("pickle", pickle_path, load_pickle),
+            ("flat", flat_path, lambda: SimpleRandomForest.load(flat_path, mmap=False)),
+            ("mmap", flat_path, lambda: SimpleRandomForest.load(flat_path)),
+        ):
+            loaded, elapsed = time_call(load)
+            match = np.array_equal(loaded.predict(X), expected)
+            size = os.path.getsize(path) / 1e6
+            print(f"{name:>8} {size:>10.1f} {elapsed * 1e3:>10.1f} {match}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the custom Random Forest implementation."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = subparsers.add_parser(
+        "split", help="Benchmark DecisionTree.find_best_split"
+    )
+    split_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 100000]
+    )
+    split_parser.add_argument(
+        "--legacy_limit",
+        type=int,
+        default=2000,
+        help="Largest size on which to run the quadratic legacy search",
+    )
+
+    fit_parser = subparsers.add_parser(
+        "fit", help="Benchmark exact against histogram-binned forest training"
+    )
+    fit_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    fit_parser.add_argument("--n_estimators", type=int, default=10)
+    fit_parser.add_argument("--max_depth", type=int, default=10)
+    fit_parser.add_argument("--max_bins", type=int, default=255)
+
+    rolling_parser = subparsers.add_parser(
+        "rolling", help="Benchmark the rolling window feature engine"
+    )
+    rolling_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100000, 1000000, 10000000]
+    )
+    rolling_parser.add_argument(
+        "--legacy_limit",
+        type=int,
+        default=1000000,
+        help="Largest size on which to run the pandas implementation",
+    )
+    rolling_parser.add_argument(
+        "--window_size", type=int, default=CONFIG["window_size"]
+    )
+
+    load_parser = subparsers.add_parser(
+        "load", help="Benchmark pickle against memory-mapped forest loading"
+    )
+    load_parser.add_argument("--n_samples", type=int, default=100000)
+    load_parser.add_argument("--n_estimators", type=int, default=100)
+    load_parser.add_argument("--max_depth", type=int, default=16)
+
+    args = parser.parse_args()
+    if args.command == "split":
+        benchmark_split(args.sizes, args.legacy_limit)
+    elif args.command == "fit":
+        benchmark_fit(args.sizes, args.n_estimators, args.max_depth, args.max_bins)
+    elif args.command == "rolling":
+        benchmark_rolling(args.sizes, args.legacy_limit, args.window_size)
+    elif args.command == "load":
+        benchmark_load(args.n_samples, args.n_estimators, args.max_depth)
+
+
+if __name__ == "__main__":
+    main()
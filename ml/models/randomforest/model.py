@@ -1,6 +1,78 @@
+import json
+import os
+import struct
 import numpy as np
-import random
 from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+MAX_BINS = 255
+TREE_LEAF = -1
+
+# Flat forest file: magic, format version and header size, a JSON header, then the
+# node arrays of all trees concatenated, each starting on an aligned offset
+FOREST_MAGIC = b"SRFOREST"
+FOREST_FORMAT_VERSION = 1
+FOREST_ALIGNMENT = 64
+FOREST_ARRAYS = {
+    "feature": "<i4",
+    "threshold": "<f8",
+    "left": "<i4",
+    "right": "<i4",
+    "value": "<i4",
+}
+
+
+def compute_bin_thresholds(X, max_bins=MAX_BINS):
+    """
+    Computes quantile-based bin thresholds for every feature.
+
+    Features with at most max_bins distinct values get one bin per value, otherwise
+    the thresholds are taken at evenly spaced quantiles of the feature.
+
+    Args:
+        X (np.ndarray): The feature matrix for the dataset.
+        max_bins (int): The maximum number of bins per feature.
+
+    Returns:
+        np.ndarray: Thresholds of shape (n_features, n_bins - 1), padded with inf. A value
+            falls in bin b when it is <= thresholds[feature, b] and > thresholds[feature, b - 1].
+    """
+    if not isinstance(max_bins, int) or not 2 <= max_bins <= MAX_BINS:
+        raise ValueError(f"max_bins must be an integer between 2 and {MAX_BINS}")
+    feature_thresholds = []
+    for column in np.asarray(X, dtype=np.float64).T:
+        values = np.unique(column)
+        if len(values) > max_bins:
+            quantiles = np.linspace(0, 1, max_bins + 1)[1:-1]
+            values = np.unique(np.quantile(column, quantiles, method="lower"))
+            feature_thresholds.append(values)
+        else:
+            feature_thresholds.append(values[:-1])
+    n_thresholds = max(len(t) for t in feature_thresholds)
+    thresholds = np.full((len(feature_thresholds), max(n_thresholds, 1)), np.inf)
+    for feature, values in enumerate(feature_thresholds):
+        thresholds[feature, : len(values)] = values
+    return thresholds
+
+
+def bin_features(X, thresholds):
+    """
+    Quantizes a feature matrix into bin codes.
+
+    Args:
+        X (np.ndarray): The feature matrix for the dataset.
+        thresholds (np.ndarray): Bin thresholds from compute_bin_thresholds.
+
+    Returns:
+        np.ndarray: A uint8 matrix of bin codes with the same shape as X.
+    """
+    X = np.asarray(X)
+    X_binned = np.empty(X.shape, dtype=np.uint8)
+    for feature in range(X.shape[1]):
+        X_binned[:, feature] = np.searchsorted(
+            thresholds[feature], X[:, feature], side="left"
+        )
+    return X_binned
 
 
 class DecisionTree:
@@ -9,20 +81,116 @@ class DecisionTree:
 
     Attributes:
         max_depth (int): The maximum depth of the tree.
-        tree (dict): The nested dictionary storing the structure and decision nodes of the tree.
+        feature (np.ndarray): The feature index tested at each node, TREE_LEAF for leaves.
+        threshold (np.ndarray): The split value of each node; samples <= threshold go left.
+        left (np.ndarray): The index of each node's left child. Leaves point to themselves.
+        right (np.ndarray): The index of each node's right child. Leaves point to themselves.
+        value (np.ndarray): The majority class label of the training samples at each node.
     """
 
-    def __init__(self, max_depth=2):
+    @staticmethod
+    def majority_label(y):
+        """
+        Returns the most frequent class label, preferring the smallest label on ties.
+
+        Args:
+            y (array-like): The list or array of class labels.
+
+        Returns:
+            int: The most frequent class label.
+        """
+        return int(np.argmax(np.bincount(y)))
+
+    def __init__(self, max_depth=2, random_state=None):
         """
         Initializes a DecisionTree with a specified maximum depth.
 
         Args:
             max_depth (int): The maximum depth of the tree.
+            random_state (int or np.random.Generator, optional): Seed or generator used to
+                sample candidate features at each node.
         """
         if not isinstance(max_depth, int) or max_depth < 1:
             raise ValueError("max_depth must be a positive integer")
         self.max_depth = max_depth
-        self.tree = {}
+        self.rng = np.random.default_rng(random_state)
+        self.feature = None
+        self.threshold = None
+        self.left = None
+        self.right = None
+        self.value = None
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled tree, converting models saved with the nested dict format.
+
+        Args:
+            state (dict): The pickled instance dictionary.
+        """
+        tree = state.pop("tree", None)
+        self.__dict__.update(state)
+        if tree is not None:
+            self.set_nodes(self.nodes_from_dict(tree))
+
+    @staticmethod
+    def add_node(nodes, value, feature=TREE_LEAF, threshold=0.0):
+        """
+        Appends a node to a list of flat node records.
+
+        Args:
+            nodes (list): The node records built so far.
+            value (int): The majority class label at the node.
+            feature (int): The feature index tested at the node, TREE_LEAF for leaves.
+            threshold (float): The split value of the node.
+
+        Returns:
+            int: The index of the new node. Its children initially point to itself.
+        """
+        node_id = len(nodes)
+        nodes.append([feature, threshold, node_id, node_id, value])
+        return node_id
+
+    @staticmethod
+    def nodes_from_dict(tree):
+        """
+        Converts a tree in the legacy nested dict format to flat node records.
+
+        Args:
+            tree (dict): A nested dictionary with "label" leaves and
+                "feature"/"value"/"left"/"right" decision nodes.
+
+        Returns:
+            list: Node records in the format produced by add_node.
+        """
+        nodes = []
+
+        def convert(node):
+            if "label" in node:
+                return DecisionTree.add_node(nodes, node["label"])
+            # Decision nodes in the dict format carry no label of their own
+            node_id = DecisionTree.add_node(
+                nodes, TREE_LEAF, node["feature"], node["value"]
+            )
+            nodes[node_id][2] = convert(node["left"])
+            nodes[node_id][3] = convert(node["right"])
+            return node_id
+
+        convert(tree)
+        return nodes
+
+    def set_nodes(self, nodes):
+        """
+        Stores node records as the parallel arrays used for prediction.
+
+        Args:
+            nodes (list): Node records in the format produced by add_node.
+        """
+        feature, threshold, left, right, value = zip(*nodes)
+        self.feature = np.array(feature, dtype=np.intp)
+        self.threshold = np.array(threshold, dtype=np.float64)
+        self.left = np.array(left, dtype=np.intp)
+        self.right = np.array(right, dtype=np.intp)
+        self.value = np.array(value)
 
     @staticmethod
     def gini_impurity(y):
@@ -63,110 +231,333 @@ class DecisionTree:
             left_weight * left_impurity + right_weight * right_impurity
         )
 
-    def find_best_split(self, X, y, feature_indices):
+    def sample_features(self, n_features):
+        """
+        Draws the random subset of features considered at a node.
+
+        Args:
+            n_features (int): The total number of features.
+
+        Returns:
+            list of int: sqrt(n_features) distinct feature indices.
+        """
+        n_sampled = max(1, int(np.sqrt(n_features)))
+        return self.rng.choice(n_features, size=n_sampled, replace=False).tolist()
+
+    @staticmethod
+    def split_gains(left_counts, total_counts):
+        """
+        Calculates the Gini gain of many candidate splits at once.
+
+        Args:
+            left_counts (np.ndarray): Per-class sample counts sent to the left child, shape (..., n_classes).
+            total_counts (np.ndarray): Per-class sample counts of the parent node, shape (n_classes,).
+
+        Returns:
+            np.ndarray: The Gini gain of every candidate split, with -inf where a child would be empty.
+        """
+        right_counts = total_counts - left_counts
+        n_left = left_counts.sum(axis=-1)
+        n_right = right_counts.sum(axis=-1)
+        n_total = total_counts.sum()
+        parent_impurity = 1 - np.sum(np.square(total_counts / n_total))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # n * gini(child) == n - sum(counts ** 2) / n
+            left_term = n_left - np.sum(np.square(left_counts), axis=-1) / n_left
+            right_term = n_right - np.sum(np.square(right_counts), axis=-1) / n_right
+            gains = parent_impurity - (left_term + right_term) / n_total
+        return np.where((n_left > 0) & (n_right > 0), gains, -np.inf)
+
+    def find_best_split(self, X, y, feature_indices, sample_indices=None):
         """
         Finds the best feature and value to split the dataset on.
 
+        Each candidate feature is sorted once; cumulative per-class counts over the
+        sorted labels then give the Gini gain of every threshold in a single pass.
+
         Args:
             X (array-like): The feature matrix for the dataset.
             y (array-like): The list or array of class labels for the dataset.
             feature_indices (list of int): Indices of features to consider for splitting.
+            sample_indices (np.ndarray, optional): Rows of X and y that belong to the node.
+                Defaults to all rows.
 
         Returns:
-            tuple: The best feature index to split on, the value to split at, and the resulting split indices.
+            tuple: The best feature index to split on, the value to split at, and a boolean
+                mask over sample_indices that is True for the samples going left.
         """
         # Validate input
         if not feature_indices:
             raise ValueError("feature_indices must be non-empty")
 
-        best_feature, best_value, best_gain, best_splits = None, None, 0, None
+        y = np.asarray(y)
+        if sample_indices is None:
+            sample_indices = np.arange(len(y))
+        one_hot = np.eye(y.max() + 1, dtype=np.int64)[y[sample_indices]]
+        total_counts = one_hot.sum(axis=0)
+
+        best_feature, best_value, best_gain = None, None, 0
         for feature in feature_indices:
-            values = set(X[:, feature])  # Unique values for this feature
-            for value in values:
-                left_indices = [i for i in range(len(X)) if X[i, feature] <= value]
-                right_indices = [i for i in range(len(X)) if X[i, feature] > value]
-                if not left_indices or not right_indices:
-                    continue  # Skip this split if it doesn't divide the dataset
+            values = X[sample_indices, feature]
+            order = np.argsort(values, kind="stable")
+            sorted_values = values[order]
+            left_counts = np.cumsum(one_hot[order], axis=0)[:-1]
+            # Only positions where the value changes are valid thresholds
+            gains = self.split_gains(left_counts, total_counts)
+            gains[sorted_values[:-1] == sorted_values[1:]] = -np.inf
+            if len(gains) == 0:
+                continue
+            position = np.argmax(gains)
+            if gains[position] > best_gain:
+                best_feature, best_value = feature, sorted_values[position]
+                best_gain = gains[position]
+
+        if best_feature is None:
+            return None, None, None
+        return best_feature, best_value, X[sample_indices, best_feature] <= best_value
 
-                gain = self.gini_gain(y, left_indices, right_indices)
-                if gain > best_gain:
-                    best_feature, best_value, best_gain = feature, value, gain
-                    best_splits = (left_indices, right_indices)
+    @staticmethod
+    def partition(indices, start, end, mask):
+        """
+        Reorders indices[start:end] so that the samples going left come first.
 
-        return best_feature, best_value, best_splits
+        A stable argsort of the mask is written back into the slice, so no per-child
+        index arrays are allocated and both children are views of indices.
 
-    def build_tree(self, X, y, depth=0):
+        Args:
+            indices (np.ndarray): Row indices shared by the whole tree.
+            start (int): The first position of the node's range in indices.
+            end (int): One past the last position of the node's range in indices.
+            mask (np.ndarray): True for the samples of indices[start:end] going left.
+
+        Returns:
+            int: The position in indices where the right child's range starts.
+        """
+        node_indices = indices[start:end]
+        node_indices[:] = node_indices[np.argsort(~mask, kind="stable")]
+        return start + int(np.count_nonzero(mask))
+
+    def build_tree(self, X, y, indices, start, end, nodes, depth=0):
         """
         Recursively builds the decision tree.
 
+        The node's samples are the rows indices[start:end]. Splitting partitions that
+        range in place so each child receives a contiguous sub-range and X is never copied.
+
         Args:
             X (array-like): The feature matrix for the dataset.
             y (array-like): The list or array of class labels for the dataset.
+            indices (np.ndarray): Row indices shared by the whole tree, partitioned in place.
+            start (int): The first position of the node's range in indices.
+            end (int): One past the last position of the node's range in indices.
+            nodes (list): The node records built so far, extended in place.
             depth (int): The current depth of the tree.
 
         Returns:
-            dict: A nested dictionary representing the structure of the decision tree.
+            int: The index of the subtree's root node.
         """
+        node_indices = indices[start:end]
+        node_y = y[node_indices]
+        label = self.majority_label(node_y)
         # Base cases
-        if depth == self.max_depth or len(set(y)) == 1:
-            return {"label": max(set(y), key=list(y).count)}
+        if depth == self.max_depth or len(np.unique(node_y)) == 1:
+            return self.add_node(nodes, label)
 
-        feature_indices = random.sample(
-            list(range(X.shape[1])), int(np.sqrt(X.shape[1]))
-        )
-        best_feature, best_value, best_splits = self.find_best_split(
-            X, y, feature_indices
+        feature_indices = self.sample_features(X.shape[1])
+        best_feature, best_value, left_mask = self.find_best_split(
+            X, y, feature_indices, node_indices
         )
 
         if best_feature is None:  # No effective split found
-            return {"label": max(set(y), key=list(y).count)}
+            return self.add_node(nodes, label)
 
-        left_X, left_y = X[best_splits[0]], y[best_splits[0]]
-        right_X, right_y = X[best_splits[1]], y[best_splits[1]]
+        # Partition the node's range: left samples first, then right samples
+        middle = self.partition(indices, start, end, left_mask)
+        del left_mask
 
         # Recursively build the left and right branches
-        left_branch = self.build_tree(left_X, left_y, depth + 1)
-        right_branch = self.build_tree(right_X, right_y, depth + 1)
-
-        return {
-            "feature": best_feature,
-            "value": best_value,
-            "left": left_branch,
-            "right": right_branch,
-        }
+        node_id = self.add_node(nodes, label, best_feature, best_value)
+        nodes[node_id][2] = self.build_tree(
+            X, y, indices, start, middle, nodes, depth + 1
+        )
+        nodes[node_id][3] = self.build_tree(
+            X, y, indices, middle, end, nodes, depth + 1
+        )
+        return node_id
 
-    def fit(self, X, y):
+    @staticmethod
+    def build_histogram(X_binned, y, n_bins, n_classes, sample_indices):
+        """
+        Counts the samples of every class falling in every bin of every feature.
+
+        Args:
+            X_binned (np.ndarray): The uint8 bin codes for the dataset.
+            y (np.ndarray): The array of class labels for the dataset.
+            n_bins (int): The number of bins per feature.
+            n_classes (int): The number of classes.
+            sample_indices (np.ndarray): Rows of X_binned and y to count.
+
+        Returns:
+            np.ndarray: Histogram of shape (n_features, n_bins, n_classes).
+        """
+        n_features = X_binned.shape[1]
+        histogram = np.empty((n_features, n_bins, n_classes), dtype=np.int64)
+        node_y = y[sample_indices]
+        for feature in range(n_features):
+            codes = X_binned[sample_indices, feature].astype(np.intp)
+            histogram[feature] = np.bincount(
+                codes * n_classes + node_y, minlength=n_bins * n_classes
+            ).reshape(n_bins, n_classes)
+        return histogram
+
+    def find_best_split_binned(self, histogram, feature_indices):
+        """
+        Finds the best feature and bin to split on from a node histogram.
+
+        Args:
+            histogram (np.ndarray): The node histogram from build_histogram.
+            feature_indices (list of int): Indices of features to consider for splitting.
+
+        Returns:
+            tuple: The best feature index and the last bin sent to the left child,
+                or (None, None) if no split improves the Gini impurity.
+        """
+        if not feature_indices:
+            raise ValueError("feature_indices must be non-empty")
+
+        total_counts = histogram[feature_indices[0]].sum(axis=0)
+        left_counts = np.cumsum(histogram[feature_indices], axis=1)[:, :-1]
+        gains = self.split_gains(left_counts, total_counts)
+        if gains.size == 0:
+            return None, None
+        position, bin_index = np.unravel_index(np.argmax(gains), gains.shape)
+        if not gains[position, bin_index] > 0:
+            return None, None
+        return feature_indices[position], bin_index
+
+    def build_tree_binned(
+        self, X_binned, y, thresholds, histogram, indices, start, end, nodes, depth=0
+    ):
+        """
+        Recursively builds the decision tree over histogram-binned features.
+
+        Only the histogram of the smaller child is counted; the larger child's histogram
+        is obtained by subtracting it from the parent's. As in build_tree, the node's
+        samples are the rows indices[start:end], partitioned in place on a split.
+
+        Args:
+            X_binned (np.ndarray): The uint8 bin codes for the dataset.
+            y (np.ndarray): The array of class labels for the dataset.
+            thresholds (np.ndarray): Bin thresholds from compute_bin_thresholds.
+            histogram (np.ndarray): The histogram of the current node.
+            indices (np.ndarray): Row indices shared by the whole tree, partitioned in place.
+            start (int): The first position of the node's range in indices.
+            end (int): One past the last position of the node's range in indices.
+            nodes (list): The node records built so far, extended in place.
+            depth (int): The current depth of the tree.
+
+        Returns:
+            int: The index of the subtree's root node.
+        """
+        node_indices = indices[start:end]
+        node_y = y[node_indices]
+        label = self.majority_label(node_y)
+        # Base cases
+        if depth == self.max_depth or len(np.unique(node_y)) == 1:
+            return self.add_node(nodes, label)
+
+        feature_indices = self.sample_features(X_binned.shape[1])
+        best_feature, best_bin = self.find_best_split_binned(histogram, feature_indices)
+
+        if best_feature is None:  # No effective split found
+            return self.add_node(nodes, label)
+
+        # Partition the node's range: left samples first, then right samples
+        mask = X_binned[node_indices, best_feature] <= best_bin
+        middle = self.partition(indices, start, end, mask)
+        left_indices, right_indices = indices[start:middle], indices[middle:end]
+
+        # Histogram subtraction: count the smaller child, derive its sibling
+        n_bins, n_classes = histogram.shape[1:]
+        if len(left_indices) <= len(right_indices):
+            left_hist = self.build_histogram(
+                X_binned, y, n_bins, n_classes, left_indices
+            )
+            right_hist = histogram - left_hist
+        else:
+            right_hist = self.build_histogram(
+                X_binned, y, n_bins, n_classes, right_indices
+            )
+            left_hist = histogram - right_hist
+        del left_indices, right_indices, mask
+
+        node_id = self.add_node(
+            nodes, label, best_feature, thresholds[best_feature, best_bin]
+        )
+        nodes[node_id][2] = self.build_tree_binned(
+            X_binned, y, thresholds, left_hist, indices, start, middle, nodes, depth + 1
+        )
+        nodes[node_id][3] = self.build_tree_binned(
+            X_binned, y, thresholds, right_hist, indices, middle, end, nodes, depth + 1
+        )
+        return node_id
+
+    def fit(self, X, y, thresholds=None, sample_indices=None):
         """
         Fits the decision tree model to the dataset.
 
         Args:
-            X (array-like): The feature matrix for the dataset.
+            X (array-like): The feature matrix for the dataset, or its uint8 bin codes
+                when thresholds is given.
             y (array-like): The list or array of class labels for the dataset.
+            thresholds (np.ndarray, optional): Bin thresholds from compute_bin_thresholds.
+                When given, splits are searched over per-node histograms.
+            sample_indices (array-like, optional): Rows of X to train on, possibly repeated
+                (e.g. a bootstrap sample). Defaults to all rows.
         """
         # Validate input sizes
         if X.shape[0] != len(y):
             raise ValueError("Mismatch between number of features and labels")
-        self.tree = self.build_tree(X, y)
+        X, y = np.asarray(X), np.asarray(y)
+        if sample_indices is None:
+            indices = np.arange(X.shape[0])
+        else:
+            indices = np.array(sample_indices, dtype=np.intp)
+        nodes = []
+        if thresholds is None:
+            self.build_tree(X, y, indices, 0, len(indices), nodes)
+        else:
+            histogram = self.build_histogram(
+                X, y, thresholds.shape[1] + 1, int(y.max()) + 1, indices
+            )
+            self.build_tree_binned(
+                X, y, thresholds, histogram, indices, 0, len(indices), nodes
+            )
+        self.set_nodes(nodes)
 
-    def predict_one(self, node, x):
+    def apply(self, X):
         """
-        Predicts the class label for a single sample based on the decision tree.
+        Finds the leaf reached by every sample.
+
+        All samples descend the tree together, one level per step, using vectorized
+        indexing into the node arrays. Leaves point to themselves, so samples that
+        reach a leaf early simply stay there.
 
         Args:
-            node (dict): The current node in the decision tree.
-            x (array-like): The feature vector for the sample.
+            X (array-like): The matrix of features for the samples.
 
         Returns:
-            int: The predicted class label.
-        """
-        # Check if we're at a leaf node
-        if "label" in node:
-            return node["label"]
-        # Otherwise move to the next node
-        if x[node["feature"]] <= node["value"]:
-            return self.predict_one(node["left"], x)
-        else:
-            return self.predict_one(node["right"], x)
+            np.ndarray: The index of the leaf node reached by each sample.
+        """
+        if self.feature is None:
+            raise ValueError("The tree has not been trained yet")
+        X = np.asarray(X)
+        rows = np.arange(X.shape[0])
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
 
     def predict(self, X):
         """
@@ -176,9 +567,61 @@ class DecisionTree:
             X (array-like): The matrix of features for the samples.
 
         Returns:
-            list: The predicted class labels.
+            np.ndarray: The predicted class labels.
         """
-        return [self.predict_one(self.tree, x) for x in X]
+        return self.value[self.apply(X)]
+
+
+# Arrays attached from shared memory in each worker process, set by _init_worker
+_shared = {}
+
+
+def _share_array(array):
+    """
+    Copies an array into a new shared memory block.
+
+    Args:
+        array (np.ndarray): The array to share.
+
+    Returns:
+        tuple: The SharedMemory block and the (name, shape, dtype) spec used to attach to it.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _init_worker(X_spec, y_spec, max_depth, thresholds):
+    """
+    Attaches a worker process to the shared training data, once per process.
+
+    Args:
+        X_spec (tuple): The shared memory spec of the feature matrix.
+        y_spec (tuple): The shared memory spec of the labels.
+        max_depth (int): The maximum depth of each tree.
+        thresholds (np.ndarray or None): Bin thresholds when training in binned mode.
+    """
+    for key, (name, shape, dtype) in (("X", X_spec), ("y", y_spec)):
+        block = shared_memory.SharedMemory(name=name)
+        _shared[f"{key}_block"] = block  # Keep the mapping alive
+        _shared[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _shared["max_depth"] = max_depth
+    _shared["thresholds"] = thresholds
+
+
+def _train_shared_tree(seed):
+    """
+    Trains one tree in a worker process on the shared training data.
+
+    Args:
+        seed (int): The seed from which the tree rebuilds its bootstrap sample.
+
+    Returns:
+        DecisionTree: The trained decision tree.
+    """
+    return SimpleRandomForest.train_tree(
+        _shared["X"], _shared["y"], seed, _shared["max_depth"], _shared["thresholds"]
+    )
 
 
 class SimpleRandomForest:
@@ -188,73 +631,312 @@ class SimpleRandomForest:
     Attributes:
         n_estimators (int): The number of trees in the forest.
         max_depth (int): The maximum depth of each tree in the forest.
+        max_bins (int or None): The number of histogram bins per feature, or None for exact splits.
+        n_jobs (int or None): The number of worker processes used for training.
+        random_state (int or None): Seed from which every tree's seed is derived.
+        oob_score (bool): Whether to compute the out-of-bag accuracy when fitting.
+        bin_thresholds (np.ndarray or None): The bin thresholds computed when fitting in binned mode.
+        tree_seeds (np.ndarray): The seed each tree used for its bootstrap sample and feature sampling.
+        oob_masks (np.ndarray): Boolean matrix of shape (n_estimators, n_samples), True where a
+            training row was left out of a tree's bootstrap sample.
+        oob_score_ (float or None): Accuracy of the out-of-bag vote on the training data.
+        classes_ (np.ndarray): The sorted class labels seen during fit. Trees predict indices into it.
         trees (list): A list of DecisionTree objects that make up the forest.
     """
 
-    def __init__(self, n_estimators=10, max_depth=2):
+    def __init__(
+        self,
+        n_estimators=10,
+        max_depth=2,
+        max_bins=None,
+        n_jobs=None,
+        random_state=None,
+        oob_score=False,
+    ):
         """
         Initializes a SimpleRandomForest with specified number of trees and maximum depth.
 
         Args:
             n_estimators (int): The number of trees in the forest.
             max_depth (int): The maximum depth of each tree in the forest.
+            max_bins (int, optional): If set, each feature is quantized into at most this
+                many bins (up to 255) before fitting and splits are searched over histograms.
+            n_jobs (int, optional): The number of worker processes. None or -1 uses all
+                cores, 1 trains in the current process.
+            random_state (int, optional): Seed for reproducible bootstrap and feature sampling.
+            oob_score (bool): Whether to compute oob_score_ at the end of fit.
         """
         # Validate parameters
         if not isinstance(n_estimators, int) or n_estimators < 1:
             raise ValueError("n_estimators must be a positive integer")
         if not isinstance(max_depth, int) or max_depth < 1:
             raise ValueError("max_depth must be a positive integer")
+        if max_bins is not None and (
+            not isinstance(max_bins, int) or not 2 <= max_bins <= MAX_BINS
+        ):
+            raise ValueError(f"max_bins must be an integer between 2 and {MAX_BINS}")
+        if n_jobs is not None and (
+            not isinstance(n_jobs, int) or (n_jobs < 1 and n_jobs != -1)
+        ):
+            raise ValueError("n_jobs must be a positive integer, -1 or None")
         self.n_estimators = n_estimators
         self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.oob_score = oob_score
+        self.bin_thresholds = None
+        self.tree_seeds = None
+        self.oob_masks = None
+        self.oob_score_ = None
+        self.classes_ = None
         self.trees = []
 
-    def bootstrap_sample(self, X, y):
+    def __setstate__(self, state):
         """
-        Creates a bootstrap sample of the dataset.
+        Restores a pickled forest, filling in attributes missing from older versions.
+
+        Forests pickled before label encoding have trees that predict the raw integer
+        labels, which is equivalent to classes_ = [0, 1, ..., max_label].
 
         Args:
-            X (array-like): The feature matrix for the dataset.
-            y (array-like): The list or array of class labels for the dataset.
+            state (dict): The pickled instance dictionary.
+        """
+        defaults = dict.fromkeys(
+            ("max_bins", "n_jobs", "random_state", "bin_thresholds", "tree_seeds"),
+        )
+        defaults.update(oob_score=False, oob_masks=None, oob_score_=None)
+        self.__dict__.update(defaults)
+        self.__dict__.update(state)
+        if "classes_" not in state:
+            leaf_values = [tree.value[tree.feature == TREE_LEAF] for tree in self.trees]
+            max_label = max((int(values.max()) for values in leaf_values), default=0)
+            self.classes_ = np.arange(max_label + 1)
+
+    @staticmethod
+    def bootstrap_indices(n_samples, seed):
+        """
+        Draws the row indices of a bootstrap sample.
+
+        Args:
+            n_samples (int): The number of rows in the dataset.
+            seed (int): The tree's seed, so the sample can be rebuilt anywhere from it.
 
         Returns:
-            tuple: Bootstrap sample of feature matrix and labels.
+            tuple: The bootstrap row indices and the generator, advanced past the draw.
         """
-        # Validate dataset integrity
-        if X.shape[0] != len(y):
-            raise ValueError("Mismatch between number of features and labels")
-        n_samples = X.shape[0]
-        indices = np.random.choice(n_samples, size=n_samples, replace=True)
-        return X[indices], y[indices]
+        rng = np.random.default_rng(seed)
+        return rng.integers(0, n_samples, size=n_samples), rng
 
-    def train_tree(self, sample_data):
+    @staticmethod
+    def train_tree(X, y, seed, max_depth, thresholds=None):
         """
-        Trains a single decision tree using a sample of the dataset.
+        Trains a single decision tree on a bootstrap sample of the dataset.
 
         Args:
-            sample_data (tuple): The bootstrap sample of feature matrix and labels.
+            X (np.ndarray): The feature matrix for the dataset, or its bin codes.
+            y (np.ndarray): The array of class labels for the dataset.
+            seed (int): The seed for the tree's bootstrap sample and feature sampling.
+            max_depth (int): The maximum depth of the tree.
+            thresholds (np.ndarray, optional): Bin thresholds when training in binned mode.
 
         Returns:
             DecisionTree: The trained decision tree.
         """
-        X_sample, y_sample = sample_data
-        tree = DecisionTree(max_depth=self.max_depth)
-        tree.fit(X_sample, y_sample)
+        indices, rng = SimpleRandomForest.bootstrap_indices(len(y), seed)
+        tree = DecisionTree(max_depth=max_depth, random_state=rng)
+        tree.fit(X, y, thresholds=thresholds, sample_indices=indices)
         return tree
 
     def fit(self, X, y):
         """
         Trains the random forest on the dataset.
 
+        X and y are placed in shared memory once; each worker attaches to them and
+        rebuilds its bootstrap sample from a seed, so no copies of the data are pickled.
+
         Args:
             X (array-like): The feature matrix for the dataset.
             y (array-like): The list or array of class labels for the dataset.
         """
-        # Generate bootstrap samples for each tree
-        samples = [self.bootstrap_sample(X, y) for _ in range(self.n_estimators)]
+        X, y = np.asarray(X), np.asarray(y)
+        # Validate dataset integrity
+        if X.shape[0] != len(y):
+            raise ValueError("Mismatch between number of features and labels")
+
+        # Trees are trained on integer class indices so any label type works
+        self.classes_, y = np.unique(y, return_inverse=True)
+
+        seed_sequence = np.random.SeedSequence(self.random_state)
+        self.tree_seeds = seed_sequence.generate_state(self.n_estimators)
+        self.trees = self.train_trees(X, y)
+
+        # Rows never drawn into a tree's bootstrap sample are out-of-bag for it
+        self.oob_masks = np.empty((self.n_estimators, len(y)), dtype=bool)
+        for tree_index, seed in enumerate(self.tree_seeds):
+            indices, _ = self.bootstrap_indices(len(y), seed)
+            self.oob_masks[tree_index] = np.bincount(indices, minlength=len(y)) == 0
+        self.oob_score_ = (
+            self.compute_oob_score(X, self.classes_[y]) if self.oob_score else None
+        )
+
+    def train_trees(self, X, y):
+        """
+        Trains one tree per seed in tree_seeds, in parallel when n_jobs allows.
+
+        Args:
+            X (np.ndarray): The feature matrix for the dataset.
+            y (np.ndarray): The array of class labels for the dataset.
+
+        Returns:
+            list: The trained DecisionTree objects.
+        """
+        # Quantize once up front so workers share a compact uint8 matrix
+        if self.max_bins is not None:
+            self.bin_thresholds = compute_bin_thresholds(X, self.max_bins)
+            X = bin_features(X, self.bin_thresholds)
+        else:
+            self.bin_thresholds = None
+
+        n_jobs = self.n_jobs if self.n_jobs not in (None, -1) else os.cpu_count()
+        n_jobs = min(n_jobs, self.n_estimators)
+        if n_jobs == 1:
+            return [
+                self.train_tree(X, y, seed, self.max_depth, self.bin_thresholds)
+                for seed in self.tree_seeds
+            ]
+
+        X_block, X_spec = _share_array(X)
+        y_block, y_spec = _share_array(y)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_worker,
+                initargs=(X_spec, y_spec, self.max_depth, self.bin_thresholds),
+            ) as executor:
+                # Hand out seeds in chunks to amortize inter-process round trips
+                chunksize = max(1, self.n_estimators // (4 * n_jobs))
+                return list(
+                    executor.map(_train_shared_tree, self.tree_seeds, chunksize=chunksize)
+                )
+        finally:
+            for block in (X_block, y_block):
+                block.close()
+                block.unlink()
+
+    def check_oob_data(self, X, y):
+        """
+        Validates that X and y are the data the forest was fitted on.
+
+        Args:
+            X (array-like): The feature matrix passed to fit.
+            y (array-like): The labels passed to fit.
+
+        Returns:
+            tuple: X as a NumPy array and y encoded as indices into classes_.
+        """
+        if not self.trees or self.oob_masks is None:
+            raise ValueError("The forest has not been trained yet")
+        X, y = np.asarray(X), np.asarray(y)
+        if X.shape[0] != len(y) or len(y) != self.oob_masks.shape[1]:
+            raise ValueError("X and y must be the data the forest was fitted on")
+        return X, self.encode_labels(y)
+
+    def compute_oob_score(self, X, y):
+        """
+        Computes the accuracy of the out-of-bag vote on the training data.
+
+        Each training row is classified only by the trees that did not see it, which gives
+        a validation estimate without held-out data or extra fits.
+
+        Args:
+            X (array-like): The feature matrix passed to fit.
+            y (array-like): The labels passed to fit.
+
+        Returns:
+            float: The out-of-bag accuracy over rows left out by at least one tree.
+        """
+        X, y = self.check_oob_data(X, y)
+        votes = np.zeros((len(y), len(self.classes_)))
+        for tree, oob_mask in zip(self.trees, self.oob_masks):
+            rows = np.flatnonzero(oob_mask)
+            np.add.at(votes, (rows, tree.predict(X[rows])), 1)
+        voted = votes.sum(axis=1) > 0
+        if not voted.any():
+            raise ValueError("No out-of-bag rows; increase n_estimators")
+        return float(np.mean(np.argmax(votes[voted], axis=1) == y[voted]))
+
+    def oob_permutation_importance(self, X, y, n_repeats=1, random_state=None):
+        """
+        Computes permutation feature importance on each tree's out-of-bag rows.
+
+        For every tree, a feature's importance is the drop in accuracy on the tree's
+        out-of-bag rows after shuffling that feature among them. Features a tree never
+        splits on cannot change its predictions and are skipped.
+
+        Args:
+            X (array-like): The feature matrix passed to fit.
+            y (array-like): The labels passed to fit.
+            n_repeats (int): The number of shuffles per feature and tree.
+            random_state (int, optional): Seed for the shuffles.
+
+        Returns:
+            np.ndarray: The mean accuracy drop of each feature, averaged over trees.
+        """
+        X, y = self.check_oob_data(X, y)
+        rng = np.random.default_rng(random_state)
+        importances = np.zeros(X.shape[1])
+        for tree, oob_mask in zip(self.trees, self.oob_masks):
+            rows = np.flatnonzero(oob_mask)
+            if len(rows) == 0:
+                continue
+            X_oob, y_oob = X[rows], y[rows]
+            baseline = np.mean(tree.predict(X_oob) == y_oob)
+            for feature in np.unique(tree.feature[tree.feature != TREE_LEAF]):
+                original = X_oob[:, feature].copy()
+                for _ in range(n_repeats):
+                    X_oob[:, feature] = rng.permutation(original)
+                    accuracy = np.mean(tree.predict(X_oob) == y_oob)
+                    importances[feature] += (baseline - accuracy) / n_repeats
+                X_oob[:, feature] = original
+        return importances / len(self.trees)
+
+    def encode_labels(self, y):
+        """
+        Maps class labels to their indices in classes_.
+
+        Args:
+            y (array-like): Class labels seen during fit.
+
+        Returns:
+            np.ndarray: The index of each label in classes_.
+        """
+        y = np.asarray(y)
+        codes = np.searchsorted(self.classes_, y)
+        if np.any(codes >= len(self.classes_)) or np.any(self.classes_[codes] != y):
+            raise ValueError("y contains labels not seen during fit")
+        return codes
+
+    def predict_proba(self, X):
+        """
+        Estimates class probabilities as the fraction of trees voting for each class.
 
-        # Parallelize tree training using ProcessPoolExecutor
-        with ProcessPoolExecutor() as executor:
-            self.trees = list(executor.map(self.train_tree, samples))
+        Args:
+            X (array-like): The matrix of features for the samples.
+
+        Returns:
+            np.ndarray: Vote fractions of shape (n_samples, n_classes), ordered as classes_.
+        """
+        if not self.trees:
+            raise ValueError("The forest has not been trained yet")
+        X = np.asarray(X)
+        n_classes = len(self.classes_)
+        # Flat (row, class) vote counters, accumulated tree by tree
+        offsets = np.arange(X.shape[0]) * n_classes
+        votes = np.zeros(X.shape[0] * n_classes)
+        for tree in self.trees:
+            votes += np.bincount(offsets + tree.predict(X), minlength=votes.size)
+        return votes.reshape(X.shape[0], n_classes) / len(self.trees)
 
     def predict(self, X):
         """
@@ -264,11 +946,227 @@ class SimpleRandomForest:
             X (array-like): The matrix of features for the samples.
 
         Returns:
-            list: The predicted class labels, determined by majority vote among the trees.
+            np.ndarray: The predicted class labels, determined by majority vote among the trees.
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path):
+        """
+        Writes the forest to a flat binary file that load can memory-map.
+
+        The node arrays of all trees are concatenated into one array per field, with
+        child indices kept relative to their tree. Only what prediction needs is stored;
+        the training state (seeds, out-of-bag masks) is not.
+
+        Args:
+            path (str): The file to write.
         """
         if not self.trees:
             raise ValueError("The forest has not been trained yet")
-        # Aggregate predictions from each tree
-        tree_preds = np.array([tree.predict(X) for tree in self.trees])
-        # Majority vote
-        return np.round(tree_preds.mean(axis=0))
+        sizes = [len(tree.feature) for tree in self.trees]
+        arrays = {
+            name: np.concatenate([getattr(tree, name) for tree in self.trees]).astype(
+                dtype
+            )
+            for name, dtype in FOREST_ARRAYS.items()
+        }
+        arrays["tree_offsets"] = np.concatenate([[0], np.cumsum(sizes)]).astype("<i8")
+        arrays["tree_depths"] = np.array(
+            [tree.max_depth for tree in self.trees], dtype="<i4"
+        )
+
+        classes = np.asarray(self.classes_)
+        header = {
+            "n_estimators": len(self.trees),
+            "max_depth": self.max_depth,
+            "max_bins": self.max_bins,
+            "classes": classes.tolist(),
+            "classes_dtype": None if classes.dtype == object else classes.dtype.str,
+            "arrays": {},
+        }
+        # Offsets are relative to the data section, which starts after the header
+        offset = 0
+        for name, array in arrays.items():
+            offset += -offset % FOREST_ALIGNMENT
+            header["arrays"][name] = [array.dtype.str, offset, array.size]
+            offset += array.nbytes
+        header_bytes = json.dumps(header).encode()
+        data_start = len(FOREST_MAGIC) + struct.calcsize("<II") + len(header_bytes)
+        data_start += -data_start % FOREST_ALIGNMENT
+
+        # Write to a temporary file first so readers never map a partial model
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(FOREST_MAGIC)
+            file.write(struct.pack("<II", FOREST_FORMAT_VERSION, len(header_bytes)))
+            file.write(header_bytes)
+            for name, array in arrays.items():
+                file.seek(data_start + header["arrays"][name][1])
+                file.write(array.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a forest written by save.
+
+        With mmap the file is mapped read-only and every tree's node arrays are views
+        into the mapping, so loading does not read the nodes and all processes that load
+        the same file share one copy of it in the page cache.
+
+        Args:
+            path (str): The file written by save.
+            mmap (bool): Whether to memory-map the file instead of reading it into memory.
+
+        Returns:
+            SimpleRandomForest: The forest, ready for prediction.
+        """
+        with open(path, "rb") as file:
+            if file.read(len(FOREST_MAGIC)) != FOREST_MAGIC:
+                raise ValueError(f"{path} is not a SimpleRandomForest file")
+            version, header_size = struct.unpack(
+                "<II", file.read(struct.calcsize("<II"))
+            )
+            if version > FOREST_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported forest format version {version}, "
+                    f"expected at most {FOREST_FORMAT_VERSION}"
+                )
+            header = json.loads(file.read(header_size))
+            data_start = file.tell() + -file.tell() % FOREST_ALIGNMENT
+        if mmap:
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_start)
+        else:
+            data = np.fromfile(path, dtype=np.uint8, offset=data_start)
+        arrays = {
+            name: data[offset : offset + size * np.dtype(dtype).itemsize].view(dtype)
+            for name, (dtype, offset, size) in header["arrays"].items()
+        }
+
+        forest = cls(
+            n_estimators=header["n_estimators"],
+            max_depth=header["max_depth"],
+            max_bins=header["max_bins"],
+        )
+        classes_dtype = header["classes_dtype"]
+        forest.classes_ = np.array(
+            header["classes"], dtype=object if classes_dtype is None else classes_dtype
+        )
+        offsets = arrays["tree_offsets"]
+        for start, stop, depth in zip(offsets[:-1], offsets[1:], arrays["tree_depths"]):
+            tree = DecisionTree(max_depth=int(depth))
+            for name in FOREST_ARRAYS:
+                setattr(tree, name, arrays[name][start:stop])
+            forest.trees.append(tree)
+        return forest
+
+
+class StackedForest:
+    """
+    All trees of a trained SimpleRandomForest in one set of node arrays.
+
+    Node indices are global across trees, so one level of every tree is a single gather
+    for all samples and trees. A prediction costs a few vectorized operations per level
+    instead of a Python loop over trees, which keeps the latency of scoring one sample or
+    a small batch low. Node i occupies the slots 2 * i (right child) and 2 * i + 1 (left
+    child) of the slot arrays, so the next slot is children[slot + go_left] without
+    separate gathers for both children.
+
+    Attributes:
+        feature (np.ndarray): The feature index tested at each slot, TREE_LEAF for leaves.
+        threshold (np.ndarray): The split value at each slot; samples <= threshold go left.
+        children (np.ndarray): The slot of the right and left child of node i at 2 * i and
+            2 * i + 1. Leaves point to themselves.
+        value (np.ndarray): The class index predicted at each node.
+        roots (np.ndarray): The slot of the root node of every tree.
+        depth (int): The number of levels of the deepest tree.
+        classes_ (np.ndarray): The class labels of the forest.
+    """
+
+    def __init__(self, forest):
+        """
+        Initializes a StackedForest from the trees of a forest.
+
+        Args:
+            forest (SimpleRandomForest): A trained or loaded forest.
+        """
+        if not forest.trees:
+            raise ValueError("The forest has not been trained yet")
+        sizes = np.array([len(tree.feature) for tree in forest.trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        feature = np.concatenate([tree.feature for tree in forest.trees])
+        threshold = np.concatenate([tree.threshold for tree in forest.trees])
+        self.feature = np.repeat(feature, 2).astype(np.intp)
+        self.threshold = np.repeat(threshold, 2).astype(np.float64)
+        self.children = np.empty(2 * len(feature), dtype=np.intp)
+        self.children[0::2] = np.concatenate(
+            [tree.right + offset for tree, offset in zip(forest.trees, offsets)]
+        )
+        self.children[1::2] = np.concatenate(
+            [tree.left + offset for tree, offset in zip(forest.trees, offsets)]
+        )
+        self.children *= 2
+        self.value = np.concatenate([tree.value for tree in forest.trees]).astype(np.intp)
+        self.roots = 2 * offsets.astype(np.intp)
+        self.classes_ = forest.classes_
+
+        # Descend from the roots until every tree has reached its leaves
+        self.depth = 0
+        slots = self.roots
+        while np.any(self.feature[slots] != TREE_LEAF):
+            slots = np.unique(self.children[slots[:, None] + [0, 1]])
+            self.depth += 1
+
+    def apply(self, X):
+        """
+        Finds the leaf reached by every sample in every tree.
+
+        Args:
+            X (array-like): The matrix of features for the samples.
+
+        Returns:
+            np.ndarray: Leaf node indices of shape (n_samples, n_trees).
+        """
+        X = np.asarray(X)
+        n_samples, n_features = X.shape
+        # Features are gathered from the raveled matrix, offset by each sample's row, and
+        # compared in the dtype of the thresholds
+        flat = X.ravel().astype(np.float64)
+        row_offsets = (np.arange(n_samples) * n_features)[:, None]
+        slot = np.repeat(self.roots[None], n_samples, axis=0)
+        for _ in range(self.depth):
+            columns = self.feature.take(slot)
+            if n_samples > 1:
+                columns += row_offsets
+            go_left = flat.take(columns) <= self.threshold.take(slot)
+            slot = self.children.take(slot + go_left)
+        return slot // 2
+
+    def predict_proba(self, X):
+        """
+        Estimates class probabilities as the fraction of trees voting for each class.
+
+        Args:
+            X (array-like): The matrix of features for the samples.
+
+        Returns:
+            np.ndarray: Vote fractions of shape (n_samples, n_classes), ordered as classes_.
+        """
+        votes = self.value[self.apply(X)]
+        n_samples, n_trees = votes.shape
+        n_classes = len(self.classes_)
+        votes += np.arange(n_samples)[:, None] * n_classes
+        counts = np.bincount(votes.ravel(), minlength=n_samples * n_classes)
+        return counts.reshape(n_samples, n_classes) / n_trees
+
+    def predict(self, X):
+        """
+        Predicts class labels for a set of samples by majority vote among the trees.
+
+        Args:
+            X (array-like): The matrix of features for the samples.
+
+        Returns:
+            np.ndarray: The predicted class labels.
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -1,9 +1,18 @@
+import os
+import sys
+import joblib
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import StandardScaler
 from scipy.fft import rfft
 from sklearn.feature_selection import VarianceThreshold
 
+# Code shared by the model directories, which import their own modules flat
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(MODELS_DIR, "common"))
+from preprocess_common import cached_frame, group_train_test_split, session_positions
+
 # Configuration parameters for preprocessing
 CONFIG = {
     "sensor_columns": [
@@ -20,30 +29,151 @@ CONFIG = {
     "window_size": 20,  # Size of the rolling window for feature generation
     "fft_components": 5,  # Number of components to keep from FFT
     "variance_threshold": 0.01,  # Threshold for feature selection via Variance Threshold
+    "group_column": "ID",  # Session identifier; windows never cross its boundaries
+}
+
+# Explicit column dtypes so large files are not parsed as float64/object
+DTYPES = {
+    **{col: "float32" for col in CONFIG["sensor_columns"]},
+    "Barometer": "float32",
+    "Pedometer": "float32",
+    "ID": "int32",
+    "Activity": "category",
 }
 
+# Order of the features produced for each column by compute_rolling_features
+ROLLING_FEATURES = ["rolling_mean", "rolling_std", "rolling_min", "rolling_max", "diff", "diff2"]
+
 
-def load_data(file_path):
+def load_data(file_path, chunksize=None):
     """
     Load sensor data from a CSV file.
 
     Args:
         file_path (str): Path to the CSV file containing the sensor data.
+        chunksize (int, optional): If given, stream the file in chunks of this many rows.
 
     Returns:
-        pd.DataFrame: DataFrame containing the loaded data.
+        pd.DataFrame or Iterator[pd.DataFrame]: DataFrame containing the loaded data, or an
+            iterator over DataFrame chunks when chunksize is given.
 
     Raises:
         Exception: If the CSV file cannot be loaded.
     """
     try:
-        return pd.read_csv(file_path)
+        return pd.read_csv(file_path, dtype=DTYPES, chunksize=chunksize)
     except Exception as e:
         print(f"Error loading the data: {e}")
         raise
 
 
-def generate_rolling_features(df, columns, window_size=20):
+def rolling_extreme(x, window_size, reduce):
+    """
+    Compute a trailing rolling minimum or maximum with the doubling trick.
+
+    After k doubling steps each entry holds the extreme of 2**k consecutive values, so any
+    window is covered by two overlapping power-of-two spans: O(n log window_size) work in
+    a handful of vectorized passes instead of one reduction per window.
+
+    Args:
+        x (np.ndarray): One-dimensional input values.
+        window_size (int): The number of observations in each window.
+        reduce (np.ufunc): np.minimum or np.maximum.
+
+    Returns:
+        np.ndarray: The extreme of each full window, of length len(x) - window_size + 1.
+    """
+    spans, span = x, 1
+    while span * 2 <= window_size:
+        spans = reduce(spans[:-span], spans[span:])
+        span *= 2
+    n_windows = len(x) - window_size + 1
+    offset = window_size - span
+    return reduce(spans[:n_windows], spans[offset : offset + n_windows])
+
+
+def compute_rolling_features(values, window_size=20, out=None, positions=None):
+    """
+    Compute rolling window and derivative features for every column in a single pass.
+
+    Rolling mean and std come from running sums over the whole column, so each window
+    costs O(1) regardless of window_size; rolling min and max use the doubling trick in
+    rolling_extreme. The results match pandas rolling()/diff(), including
+    NaN for rows without enough history.
+
+    Args:
+        values (np.ndarray): Sensor readings of shape (n_samples, n_columns).
+        window_size (int): The number of observations used for calculating the rolling statistics.
+        out (np.ndarray, optional): Preallocated float32 matrix of shape
+            (n_samples, n_columns * len(ROLLING_FEATURES)) to write into. Column-major
+            (order="F") layout is fastest, since features are written column by column.
+        positions (np.ndarray, optional): The position of every row within its session, as
+            returned by session_positions. Features whose window would reach back into a
+            previous session are set to NaN.
+
+    Returns:
+        np.ndarray: Float32 features ordered per column as in ROLLING_FEATURES.
+    """
+    values = np.asarray(values)
+    n_samples, n_columns = values.shape
+    n_features = len(ROLLING_FEATURES)
+    if out is None:
+        out = np.empty((n_samples, n_columns * n_features), dtype=np.float32, order="F")
+    out[:] = np.nan
+    if n_samples == 0:
+        return out
+
+    for column in range(n_columns):
+        x = values[:, column].astype(np.float64)
+        mean, std, low, high, diff, diff2 = (
+            out[:, column * n_features + offset] for offset in range(n_features)
+        )
+        if n_samples >= window_size:
+            # Center before accumulating to keep the running sums well conditioned
+            finite = np.isfinite(x)
+            shift = x[finite][:window_size].mean() if finite.any() else 0.0
+            centered = x - shift
+            sums = np.zeros(n_samples + 1)
+            # Like pandas, a window containing a missing reading yields NaN
+            missing = ~finite
+            if missing.any():
+                centered[missing] = 0.0
+                np.cumsum(missing, out=sums[1:])
+                incomplete = (sums[window_size:] - sums[:-window_size]) > 0
+            else:
+                incomplete = None
+            np.cumsum(centered, out=sums[1:])
+            window_sum = sums[window_size:] - sums[:-window_size]
+            mean[window_size - 1 :] = window_sum / window_size + shift
+            if window_size > 1:
+                np.multiply(centered, centered, out=centered)
+                np.cumsum(centered, out=sums[1:])
+                # (sum of squares - sum ** 2 / n) / (n - 1), computed in place
+                variance = sums[window_size:] - sums[:-window_size]
+                window_sum *= window_sum
+                window_sum /= window_size
+                variance -= window_sum
+                variance /= window_size - 1
+                np.maximum(variance, 0.0, out=variance)
+                std[window_size - 1 :] = np.sqrt(variance, out=variance)
+            if incomplete is not None:
+                mean[window_size - 1 :][incomplete] = np.nan
+                std[window_size - 1 :][incomplete] = np.nan
+            low[window_size - 1 :] = rolling_extreme(x, window_size, np.minimum)
+            high[window_size - 1 :] = rolling_extreme(x, window_size, np.maximum)
+        # Derivative features capture the rate of change in sensor readings
+        first = np.diff(x)
+        diff[1:] = first
+        diff2[2:] = np.diff(first)
+    if positions is not None:
+        # Rows needed before the current one by each entry of ROLLING_FEATURES
+        lags = [window_size - 1] * 4 + [1, 2]
+        for offset, lag in enumerate(lags):
+            out[positions < lag, offset::n_features] = np.nan
+    return out
+
+
+def generate_rolling_features(df, columns, window_size=20, group_column=None):
     """
     Generate rolling window features for each specified column.
 
@@ -51,55 +181,138 @@ def generate_rolling_features(df, columns, window_size=20):
         df (pd.DataFrame): DataFrame containing the sensor data.
         columns (list of str): List of column names to calculate rolling features for.
         window_size (int): The number of observations used for calculating the rolling statistics.
+        group_column (str, optional): Column identifying sessions. If given, rows whose
+            window spans two sessions are dropped along with the leading rows.
 
     Returns:
         pd.DataFrame: The original DataFrame with added rolling window features.
     """
-    for col in columns:
-        df[f"{col}_rolling_mean"] = df[col].rolling(window=window_size).mean()
-        df[f"{col}_rolling_std"] = df[col].rolling(window=window_size).std()
-        df[f"{col}_rolling_min"] = df[col].rolling(window=window_size).min()
-        df[f"{col}_rolling_max"] = df[col].rolling(window=window_size).max()
-        # Derivative features capture the rate of change in sensor readings
-        df[f"{col}_diff"] = df[col].diff()
-        df[f"{col}_diff2"] = df[col].diff().diff()
+    positions = session_positions(df[group_column]) if group_column else None
+    features = compute_rolling_features(
+        df[columns].to_numpy(), window_size, positions=positions
+    )
+    names = [f"{col}_{feature}" for col in columns for feature in ROLLING_FEATURES]
+    # Attach all feature columns at once rather than growing the frame column by column
+    df = pd.concat(
+        [df, pd.DataFrame(features, index=df.index, columns=names, copy=False)], axis=1
+    )
     # Remove initial rows with NaN values resulting from the rolling and differencing operations
     return df.dropna()
 
 
-def standardize_features(df, columns):
+def standardize_features(df, columns, scaler=None):
     """
     Standardize sensor features by removing the mean and scaling to unit variance.
 
     Args:
         df (pd.DataFrame): DataFrame containing the sensor data.
         columns (list of str): List of column names to be standardized.
+        scaler (StandardScaler, optional): An already fitted scaler to apply. By default a
+            new scaler is fitted on df.
 
     Returns:
         pd.DataFrame: DataFrame with standardized feature columns.
     """
-    scaler = StandardScaler()
-    df[columns] = scaler.fit_transform(df[columns])
+    if scaler is None:
+        scaler = StandardScaler()
+        df[columns] = scaler.fit_transform(df[columns])
+    else:
+        df[columns] = scaler.transform(df[columns])
     return df
 
 
-def generate_frequency_features(df, columns, n_components=5):
+def fit_scaler_streaming(file_path, columns, chunksize):
+    """
+    Fit a StandardScaler over a CSV file one chunk at a time.
+
+    Args:
+        file_path (str): Path to the CSV file containing the sensor data.
+        columns (list of str): List of column names to be standardized.
+        chunksize (int): The number of rows read per chunk.
+
+    Returns:
+        StandardScaler: A scaler fitted on the whole file.
+    """
+    scaler = StandardScaler()
+    for chunk in load_data(file_path, chunksize):
+        scaler.partial_fit(chunk[columns])
+    return scaler
+
+
+def compute_frequency_features(
+    values, window_size=20, n_components=5, out=None, block_size=65536, positions=None
+):
+    """
+    Compute spectral magnitudes over a trailing window ending at every row.
+
+    Windows are a strided sliding_window_view of the input, transformed with one batched
+    rfft along the last axis per block of rows, so no window is copied or looped over in
+    Python. Blocks bound the size of the complex intermediate.
+
+    Args:
+        values (np.ndarray): Sensor readings of shape (n_samples, n_columns).
+        window_size (int): The number of observations in each window.
+        n_components (int): Number of frequency components to retain, starting at DC.
+        out (np.ndarray, optional): Preallocated float32 matrix of shape
+            (n_samples, n_columns * n_components) to write into.
+        block_size (int): The number of windows transformed per rfft call.
+        positions (np.ndarray, optional): The position of every row within its session, as
+            returned by session_positions. Windows spanning two sessions are set to NaN.
+
+    Returns:
+        np.ndarray: Float32 magnitudes ordered per column, NaN for the first
+            window_size - 1 rows.
+    """
+    values = np.asarray(values)
+    n_samples, n_columns = values.shape
+    if n_components > window_size // 2 + 1:
+        raise ValueError("n_components exceeds the number of rfft bins of a window")
+    if out is None:
+        out = np.empty((n_samples, n_columns * n_components), dtype=np.float32, order="F")
+    out[:] = np.nan
+    if n_samples < window_size:
+        return out
+
+    # (n_windows, n_columns, window_size) view over the input, no copy
+    windows = sliding_window_view(values, window_size, axis=0)
+    for start in range(0, len(windows), block_size):
+        block = windows[start : start + block_size]
+        magnitudes = np.abs(rfft(block, axis=-1)[..., :n_components])
+        rows = slice(window_size - 1 + start, window_size - 1 + start + len(block))
+        out[rows] = magnitudes.reshape(len(block), -1)
+    if positions is not None:
+        out[positions < window_size - 1] = np.nan
+    return out
+
+
+def generate_frequency_features(
+    df, columns, n_components=5, window_size=20, group_column=None
+):
     """
     Generate frequency domain features using the Fast Fourier Transform (FFT).
 
+    Each row gets the magnitudes of the first n_components frequency bins of the trailing
+    window_size readings of every column. Rows without a full window are NaN.
+
     Args:
         df (pd.DataFrame): DataFrame containing the sensor data.
         columns (list of str): List of column names to transform into the frequency domain.
         n_components (int): Number of frequency components to retain.
+        window_size (int): The number of observations in each window.
+        group_column (str, optional): Column identifying sessions. If given, windows
+            spanning two sessions are NaN as well.
 
     Returns:
         pd.DataFrame: DataFrame with added frequency domain features.
     """
-    for col in columns:
-        fft_values = rfft(df[col])
-        for i in range(n_components):
-            df[f"{col}_fft_{i}"] = np.abs(fft_values[:, i])
-    return df
+    positions = session_positions(df[group_column]) if group_column else None
+    features = compute_frequency_features(
+        df[columns].to_numpy(), window_size, n_components, positions=positions
+    )
+    names = [f"{col}_fft_{i}" for col in columns for i in range(n_components)]
+    return pd.concat(
+        [df, pd.DataFrame(features, index=df.index, columns=names, copy=False)], axis=1
+    )
 
 
 def select_features(df, threshold=0.01):
@@ -113,33 +326,159 @@ def select_features(df, threshold=0.01):
     Returns:
         pd.DataFrame: DataFrame with only high-variance features.
     """
+    # Only numeric columns are candidates; labels, the session ID and other columns are kept
+    numeric = df.select_dtypes(include="number").columns.drop(
+        CONFIG["group_column"], errors="ignore"
+    )
     selector = VarianceThreshold(threshold=threshold)
-    return pd.DataFrame(
-        selector.fit_transform(df), columns=df.columns[selector.get_support()]
+    selector.fit(df[numeric])
+    dropped = set(numeric[~selector.get_support()])
+    return df[[col for col in df.columns if col not in dropped]]
+
+
+def generate_features(df):
+    """
+    Generate the frequency, rolling window and derivative features of standardized data.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the standardized sensor data.
+
+    Returns:
+        pd.DataFrame: DataFrame with added features, without rows lacking a full window.
+    """
+    # Windows are computed per session when the data carries a session column
+    group_column = CONFIG["group_column"] if CONFIG["group_column"] in df.columns else None
+    # Frequency features keep their leading NaN rows; the rolling step drops them
+    df = generate_frequency_features(
+        df,
+        CONFIG["sensor_columns"],
+        CONFIG["fft_components"],
+        CONFIG["window_size"],
+        group_column,
+    )
+    return generate_rolling_features(
+        df, CONFIG["sensor_columns"], CONFIG["window_size"], group_column
     )
 
 
-def preprocess_data(file_path):
+def iter_feature_chunks(file_path, scaler, chunksize):
+    """
+    Stream engineered features for a CSV file with bounded memory.
+
+    The last readings of each chunk are carried over in front of the next one, so every
+    window sees the same history as on the whole file and the output rows are identical to
+    the in-memory path. Session positions restart at the carried rows, which only ever
+    masks rows that are dropped anyway. The carried rows lack a full window within the combined frame and
+    are dropped again by generate_features.
+
+    Args:
+        file_path (str): Path to the CSV file containing the sensor data.
+        scaler (StandardScaler): A scaler fitted on the whole file.
+        chunksize (int): The number of rows read per chunk.
+
+    Yields:
+        pd.DataFrame: Standardized data with added features, one chunk at a time.
+    """
+    history = max(CONFIG["window_size"] - 1, 2)
+    carry = None
+    for chunk in load_data(file_path, chunksize):
+        chunk = standardize_features(chunk, CONFIG["sensor_columns"], scaler)
+        frame = chunk if carry is None else pd.concat([carry, chunk])
+        carry = frame.iloc[-history:]
+        yield generate_features(frame)
+
+
+def preprocess_data(file_path, chunksize=None, cache_dir=None, pipeline_path=None):
     """
     Preprocess sensor data: load, standardize, generate features, and select relevant features.
 
     Args:
         file_path (str): Path to the CSV file containing the sensor data.
+        chunksize (int, optional): If given, the file is streamed in chunks of this many rows
+            and only the float32 features of all rows are held in memory at once.
+        cache_dir (str, optional): If given, the result is cached there as memory-mappable
+            .npy files keyed by the file content and CONFIG, and later calls load it zero-copy.
+        pipeline_path (str, optional): If given, the fitted scaler and the selected feature
+            columns are saved there with save_pipeline, for scoring new samples.
 
     Returns:
         pd.DataFrame: Preprocessed sensor data ready for machine learning models.
     """
+    df, artifacts = cached_frame(
+        file_path, cache_dir, CONFIG, lambda: build_features(file_path, chunksize)
+    )
+    if pipeline_path is not None and "scaler" in artifacts:
+        feature_columns = [
+            col for col in df.columns if col not in ("Activity", CONFIG["group_column"])
+        ]
+        save_pipeline(pipeline_path, artifacts["scaler"], feature_columns)
+    return df
+
+
+def build_features(file_path, chunksize=None):
+    """
+    Run the preprocessing pipeline of preprocess_data without caching.
+
+    Args:
+        file_path (str): Path to the CSV file containing the sensor data.
+        chunksize (int, optional): If given, the file is streamed in chunks of this many rows.
+
+    Returns:
+        tuple: Preprocessed sensor data ready for machine learning models, and a dict
+            holding the fitted scaler.
+    """
+    if chunksize is not None:
+        scaler = fit_scaler_streaming(file_path, CONFIG["sensor_columns"], chunksize)
+        df = pd.concat(iter_feature_chunks(file_path, scaler, chunksize))
+        # Each chunk infers its own categories; restore a single categorical dtype
+        for col, dtype in DTYPES.items():
+            if dtype == "category" and col in df.columns:
+                df[col] = df[col].astype("category")
+        return select_features(df, CONFIG["variance_threshold"]), {"scaler": scaler}
+
     df = load_data(file_path)
 
     # Apply preprocessing steps
-    df = standardize_features(df, CONFIG["sensor_columns"])
-    df = generate_rolling_features(df, CONFIG["sensor_columns"], CONFIG["window_size"])
-    df = generate_frequency_features(
-        df, CONFIG["sensor_columns"], CONFIG["fft_components"]
-    )
+    scaler = StandardScaler()
+    scaler.fit(df[CONFIG["sensor_columns"]])
+    df = standardize_features(df, CONFIG["sensor_columns"], scaler)
+    df = generate_features(df)
     df = select_features(df, CONFIG["variance_threshold"])
 
-    return df
+    return df, {"scaler": scaler}
+
+
+def save_pipeline(path, scaler, feature_columns):
+    """
+    Save what is needed to turn raw readings into model features, for inference.
+
+    Args:
+        path (str): The joblib file to write.
+        scaler (StandardScaler): The scaler fitted on the sensor columns.
+        feature_columns (list of str): The model's feature columns, in training order.
+    """
+    pipeline = {
+        "scaler": scaler,
+        "feature_columns": list(feature_columns),
+        "sensor_columns": CONFIG["sensor_columns"],
+        "window_size": CONFIG["window_size"],
+        "fft_components": CONFIG["fft_components"],
+    }
+    joblib.dump(pipeline, path)
+
+
+def load_pipeline(path):
+    """
+    Load a pipeline saved by save_pipeline.
+
+    Args:
+        path (str): The joblib file written by save_pipeline.
+
+    Returns:
+        dict: The scaler, feature columns, sensor columns, window size and number of
+            FFT components the model was trained with.
+    """
+    return joblib.load(path)
 
 
 # processed_data = preprocess_data('path_to_your_data.csv')
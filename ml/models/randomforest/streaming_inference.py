@@ -0,0 +1,337 @@
+import argparse
+import time
+import numpy as np
+from model import SimpleRandomForest, StackedForest
+from preprocess import ROLLING_FEATURES, load_data, load_pipeline
+
+
+class StreamingForest:
+    """
+    Per-sample random forest scoring for a fleet of devices streaming sensor readings.
+
+    Every device keeps a ring buffer of its last window_size standardized readings along
+    with running sums, sums of squares and DFT coefficients of that window. A new reading
+    updates them in O(1) per column instead of recomputing the window, so the features of
+    the batch pipeline (FFT magnitudes, rolling mean, std, min, max and differences) are
+    available after every sample. Features are scored by a StackedForest, which keeps the
+    latency of one sample or a small micro-batch low.
+    """
+
+    def __init__(self, forest, pipeline, n_devices):
+        """
+        Args:
+            forest (SimpleRandomForest): The trained forest.
+            pipeline (dict): The preprocessing pipeline saved by preprocess.save_pipeline.
+            n_devices (int): The number of concurrent device streams.
+        """
+        self.forest = StackedForest(forest)
+        self.n_devices = n_devices
+        self.sensor_columns = pipeline["sensor_columns"]
+        self.window_size = pipeline["window_size"]
+        self.n_components = pipeline["fft_components"]
+        self.mean = pipeline["scaler"].mean_
+        self.scale = pipeline["scaler"].scale_
+        if self.window_size < 3:
+            raise ValueError("window_size must be at least 3")
+
+        # Every feature computed here, in the order of the feature matrix built by update
+        names = list(self.sensor_columns)
+        for col in self.sensor_columns:
+            names += [f"{col}_fft_{i}" for i in range(self.n_components)]
+        for col in self.sensor_columns:
+            names += [f"{col}_{feature}" for feature in ROLLING_FEATURES]
+        # Other raw columns kept by feature selection are passed through unchanged
+        self.passthrough_columns = [
+            col for col in pipeline["feature_columns"] if col not in names
+        ]
+        self.input_columns = self.sensor_columns + self.passthrough_columns
+        names += self.passthrough_columns
+        self.feature_indices = np.array(
+            [names.index(col) for col in pipeline["feature_columns"]]
+        )
+        self.n_features = len(names)
+
+        n_columns = len(self.sensor_columns)
+        self.buffer = np.zeros((n_devices, self.window_size, n_columns))
+        self.sums = np.zeros((n_devices, n_columns))
+        self.squares = np.zeros((n_devices, n_columns))
+        self.spectrum = np.zeros(
+            (n_devices, n_columns, self.n_components), dtype=np.complex128
+        )
+        self.last_diff = np.zeros((n_devices, n_columns))
+        self.counts = np.zeros(n_devices, dtype=np.int64)
+        # DFT weight of every ring buffer slot. Coefficients are accumulated against the
+        # slot rather than the position in the window, which only rotates their phase
+        slots = np.arange(self.window_size)[:, None]
+        self.twiddle = np.exp(
+            -2j * np.pi * slots * np.arange(self.n_components) / self.window_size
+        )
+        # Session of the last reading of every device, to detect session boundaries
+        self.sessions = np.full(n_devices, None, dtype=object)
+
+    @classmethod
+    def from_artifacts(
+        cls,
+        n_devices,
+        model_path="simple_random_forest.srf",
+        pipeline_path="rf_pipeline.joblib",
+    ):
+        """
+        Load the forest and pipeline written by train.py.
+
+        Args:
+            n_devices (int): The number of concurrent device streams.
+            model_path (str): Path to the forest saved with SimpleRandomForest.save.
+            pipeline_path (str): Path to the pipeline saved with preprocess.save_pipeline.
+
+        Returns:
+            StreamingForest: The streaming scorer.
+        """
+        return cls(
+            SimpleRandomForest.load(model_path), load_pipeline(pipeline_path), n_devices
+        )
+
+    def reset(self, devices=None):
+        """
+        Clear the window of some devices, or of all of them.
+
+        Args:
+            devices (np.ndarray, optional): Boolean mask or indices of the devices to reset.
+        """
+        if devices is None:
+            devices = slice(None)
+        states = (self.buffer, self.sums, self.squares, self.spectrum, self.last_diff)
+        for state in states:
+            state[devices] = 0
+        self.counts[devices] = 0
+        self.sessions[devices] = None
+
+    def update(self, devices, readings, sessions=None):
+        """
+        Append one reading per entry to the devices' windows and score them.
+
+        Readings of the same device within a call are applied in order.
+
+        Args:
+            devices (array-like): The device index of every reading.
+            readings (np.ndarray): Raw readings of shape (n_readings, len(input_columns)),
+                the sensor columns followed by the passthrough columns.
+            sessions (array-like, optional): The session ID of every reading. A device's
+                window is cleared whenever its session differs from its last one.
+
+        Returns:
+            np.ndarray: Class probabilities of shape (n_readings, n_classes), NaN for
+                readings whose device has fewer than window_size readings in its session.
+        """
+        devices = np.asarray(devices, dtype=np.intp).reshape(-1)
+        readings = np.atleast_2d(readings)
+        if readings.shape[1] != len(self.input_columns):
+            raise ValueError(f"Expected readings of {len(self.input_columns)} columns")
+        if sessions is not None:
+            sessions = np.asarray(sessions, dtype=object).reshape(-1)
+
+        probabilities = np.full((len(devices), len(self.forest.classes_)), np.nan)
+        if len(devices) == 0:
+            return probabilities
+        features = np.empty((len(devices), self.n_features), dtype=np.float32)
+        # Each round takes at most one reading per device, in the order they were given
+        rounds = self.occurrences(devices)
+        n_rounds = rounds.max() + 1
+        for occurrence in range(n_rounds):
+            rows = slice(None) if n_rounds == 1 else np.flatnonzero(rounds == occurrence)
+            if sessions is not None:
+                changed = sessions[rows] != self.sessions[devices[rows]]
+                if changed.any():
+                    self.reset(devices[rows][changed])
+                self.sessions[devices[rows]] = sessions[rows]
+            features[rows] = self.advance(devices[rows], readings[rows])
+
+        # Like the dropped rows of the batch pipeline, incomplete windows are not scored
+        selected = features[:, self.feature_indices]
+        ready = np.isfinite(selected).all(axis=1)
+        if ready.any():
+            probabilities[ready] = self.forest.predict_proba(selected[ready])
+        return probabilities
+
+    @staticmethod
+    def occurrences(devices):
+        """
+        Number the readings of every device in a call, counting from 0.
+
+        Args:
+            devices (np.ndarray): The device index of every reading.
+
+        Returns:
+            np.ndarray: How many earlier readings of the same device precede each one.
+        """
+        if len(devices) < 2:
+            return np.zeros(len(devices), dtype=np.intp)
+        order = np.argsort(devices, kind="stable")
+        ordered = devices[order]
+        first = np.r_[True, ordered[1:] != ordered[:-1]]
+        starts = np.maximum.accumulate(np.where(first, np.arange(len(devices)), 0))
+        occurrences = np.empty(len(devices), dtype=np.intp)
+        occurrences[order] = np.arange(len(devices)) - starts
+        return occurrences
+
+    def advance(self, devices, readings):
+        """
+        Push one reading into the window of each of some distinct devices.
+
+        Args:
+            devices (np.ndarray): Distinct device indices.
+            readings (np.ndarray): One raw reading per device, in input_columns order.
+
+        Returns:
+            np.ndarray: The float32 features of every reading, in the order of the feature
+                matrix; NaN rows for devices without a full window.
+        """
+        window_size = self.window_size
+        n_columns = len(self.sensor_columns)
+        # Standardize in float32 the way StandardScaler.transform does on float32 data
+        scaled = readings[:, :n_columns].astype(np.float32)
+        scaled -= self.mean
+        scaled /= self.scale
+        x = scaled.astype(np.float64)
+
+        counts = self.counts[devices]
+        slots = counts % window_size
+        oldest = self.buffer[devices, slots]
+        diff = x - self.buffer[devices, (counts - 1) % window_size]
+        diff2 = diff - self.last_diff[devices]
+        self.last_diff[devices] = diff
+        self.buffer[devices, slots] = x
+
+        # Replace the oldest reading of the window by the new one in the running sums
+        delta = x - oldest
+        self.sums[devices] += delta
+        self.squares[devices] += x * x - oldest * oldest
+        self.spectrum[devices] += delta[:, :, None] * self.twiddle[slots][:, None, :]
+        counts += 1
+        self.counts[devices] = counts
+        # Recompute the sums from the buffer once per lap to bound rounding drift
+        lapped = devices[counts % window_size == 0]
+        if len(lapped):
+            window = self.buffer[lapped]
+            self.sums[lapped] = window.sum(axis=1)
+            self.squares[lapped] = (window * window).sum(axis=1)
+            self.spectrum[lapped] = np.einsum("dwc,wk->dck", window, self.twiddle)
+
+        fft_end = n_columns * (1 + self.n_components)
+        rolling_end = fft_end + n_columns * len(ROLLING_FEATURES)
+        features = np.empty((len(devices), self.n_features), dtype=np.float32)
+        features[:, :n_columns] = scaled
+        spectrum = np.abs(self.spectrum[devices])
+        features[:, n_columns:fft_end] = spectrum.reshape(len(devices), -1)
+        # (n_devices, n_columns, len(ROLLING_FEATURES)) view of the rolling features
+        rolling = features[:, fft_end:rolling_end].reshape(len(devices), n_columns, -1)
+        sums = self.sums[devices]
+        variance = self.squares[devices] - sums * sums / window_size
+        variance /= window_size - 1
+        window = self.buffer[devices]
+        rolling[..., 0] = sums / window_size
+        rolling[..., 1] = np.sqrt(np.maximum(variance, 0.0))
+        rolling[..., 2] = window.min(axis=1)
+        rolling[..., 3] = window.max(axis=1)
+        rolling[..., 4] = diff
+        rolling[..., 5] = diff2
+        features[:, rolling_end:] = readings[:, n_columns:]
+        features[counts < window_size] = np.nan
+        return features
+
+    def predict(self, devices, readings, sessions=None):
+        """
+        Append one reading per entry to the devices' windows and return activity labels.
+
+        Args:
+            devices (array-like): The device index of every reading.
+            readings (np.ndarray): Raw readings of shape (n_readings, len(input_columns)).
+            sessions (array-like, optional): The session ID of every reading.
+
+        Returns:
+            np.ndarray: The predicted label of every reading; None until a full window.
+        """
+        probabilities = self.update(devices, readings, sessions)
+        labels = np.full(len(probabilities), None, dtype=object)
+        ready = ~np.isnan(probabilities[:, 0])
+        labels[ready] = self.forest.classes_[probabilities[ready].argmax(axis=1)]
+        return labels
+
+
+def device_streams(df, columns, n_devices):
+    """
+    Deal the sessions of a recording out to devices, one reading at a time.
+
+    Args:
+        df (pd.DataFrame): Sensor data with an ID column.
+        columns (list of str): The input columns of the streaming scorer.
+        n_devices (int): The number of simulated devices.
+
+    Returns:
+        list: For every device, a (session IDs, readings) pair in stream order.
+    """
+    values = df[columns].to_numpy(dtype=np.float32)
+    ids = df["ID"].to_numpy()
+    bounds = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1], True])
+    rows = [[] for _ in range(n_devices)]
+    for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        rows[i % n_devices].extend(range(start, stop))
+    return [(ids[device_rows], values[device_rows]) for device_rows in rows]
+
+
+def replay(streamer, streams):
+    """
+    Score device streams in lockstep ticks, one call with a reading of every device.
+
+    Args:
+        streamer (StreamingForest): The streaming scorer.
+        streams (list): Per-device (session IDs, readings) pairs from device_streams.
+
+    Returns:
+        np.ndarray: The latency of every call in seconds.
+    """
+    n_ticks = max(len(ids) for ids, _ in streams)
+    latencies = np.empty(n_ticks)
+    for tick in range(n_ticks):
+        active = [device for device, (ids, _) in enumerate(streams) if tick < len(ids)]
+        sessions = [streams[device][0][tick] for device in active]
+        readings = np.stack([streams[device][1][tick] for device in active])
+        start = time.perf_counter()
+        streamer.update(active, readings, sessions)
+        latencies[tick] = time.perf_counter() - start
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a sensor recording through streaming random forest inference."
+    )
+    parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument(
+        "--n_devices",
+        type=int,
+        default=1,
+        help="Devices scored per call; 1 measures per-sample latency",
+    )
+    parser.add_argument("--model_path", type=str, default="simple_random_forest.srf")
+    parser.add_argument("--pipeline_path", type=str, default="rf_pipeline.joblib")
+    args = parser.parse_args()
+
+    streamer = StreamingForest.from_artifacts(
+        args.n_devices, args.model_path, args.pipeline_path
+    )
+    streams = device_streams(
+        load_data(args.data_path), streamer.input_columns, args.n_devices
+    )
+    latencies = replay(streamer, streams)
+    n_samples = sum(len(ids) for ids, _ in streams)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+    print(
+        f"Scored {n_samples} samples from {args.n_devices} devices in {len(latencies)} "
+        f"calls: p50 {p50:.0f}us, p99 {p99:.0f}us per call, "
+        f"{n_samples / latencies.sum():.0f} samples/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
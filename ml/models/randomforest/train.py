@@ -1,6 +1,5 @@
 import argparse
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.metrics import (
     classification_report,
     accuracy_score,
@@ -8,7 +7,7 @@ from sklearn.metrics import (
     precision_score,
     recall_score,
 )
-from preprocess import preprocess_data
+from preprocess import CONFIG, preprocess_data, group_train_test_split
 from model import SimpleRandomForest
 
 
@@ -22,11 +21,47 @@ def main():
         description="Train and evaluate a Random Forest model on sensor data."
     )
     parser.add_argument("data_path", type=str, help="Path to the sensor data CSV file")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the CSV file in chunks of this many rows to bound memory use",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Cache engineered features here and reuse them on later runs",
+    )
+    parser.add_argument(
+        "--split_path",
+        type=str,
+        default=None,
+        help="JSON file holding the session train/test split, created if missing "
+        "and shared with the other models",
+    )
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        default="simple_random_forest.srf",
+        help="Save the trained forest here in the memory-mappable forest format",
+    )
+    parser.add_argument(
+        "--pipeline_path",
+        type=str,
+        default="rf_pipeline.joblib",
+        help="Save the fitted scaler and feature columns here for streaming inference",
+    )
     args = parser.parse_args()
 
     # Data preprocessing
     try:
-        processed_df = preprocess_data(args.data_path)
+        processed_df = preprocess_data(
+            args.data_path,
+            chunksize=args.chunksize,
+            cache_dir=args.cache_dir,
+            pipeline_path=args.pipeline_path,
+        )
     except Exception as e:
         print(f"Error during data preprocessing: {e}")
         return
@@ -35,35 +70,53 @@ def main():
     try:
         if "Activity" not in processed_df.columns:
             raise ValueError("Column 'Activity' not found in data.")
-        X = processed_df.drop("Activity", axis=1)
+        # The session ID only drives the split and is not a feature
+        X = processed_df.drop(["Activity", CONFIG["group_column"]], axis=1)
         y = processed_df["Activity"]
     except Exception as e:
         print(f"Error splitting data into features and target: {e}")
         return
 
-    # Data splitting for training and testing
+    # Data splitting for training and testing, keeping each session on one side
     try:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.3, random_state=42
+        train_rows, test_rows = group_train_test_split(
+            processed_df[CONFIG["group_column"]],
+            test_size=0.3,
+            random_state=42,
+            split_path=args.split_path,
         )
+        X_train, X_test = X.iloc[train_rows], X.iloc[test_rows]
+        y_train, y_test = y.iloc[train_rows], y.iloc[test_rows]
     except Exception as e:
         print(f"Error during data splitting: {e}")
         return
 
     # Initialize and train the Random Forest model
     try:
-        rf = SimpleRandomForest(n_estimators=100, max_depth=10)
-        # Cross-validation
-        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-        cv_scores = cross_val_score(rf, X_train, y_train, cv=cv, scoring="accuracy")
-        print(f"Cross-validation scores: {cv_scores}")
-        print(f"Mean cross-validation score: {cv_scores.mean()}")
-
+        rf = SimpleRandomForest(
+            n_estimators=100, max_depth=10, random_state=42, oob_score=True
+        )
         rf.fit(X_train, y_train)  # Training the model
+        # Out-of-bag validation replaces a separate cross-validation run
+        print(f"Out-of-bag score: {rf.oob_score_}")
+
+        importances = rf.oob_permutation_importance(X_train, y_train, random_state=42)
+        print("Out-of-bag permutation importance:")
+        for column, importance in sorted(
+            zip(X.columns, importances), key=lambda item: item[1], reverse=True
+        ):
+            print(f"  {column}: {importance:.4f}")
     except Exception as e:
         print(f"Error during model training: {e}")
         return
 
+    try:
+        rf.save(args.model_path)
+        print(f"Model saved to {args.model_path}")
+    except Exception as e:
+        print(f"Error saving the model: {e}")
+        return
+
     # Model evaluation
     try:
         predictions = rf.predict(X_test)
@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+import pandas as pd
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 client connection to the scoring server."""
+
+    def __init__(self, host, port, unix_socket=None):
+        """
+        Args:
+            host (str): The server host.
+            port (int): The server port.
+            unix_socket (str, optional): Connect to this Unix socket instead.
+        """
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        if self.unix_socket:
+            connection = asyncio.open_unix_connection(self.unix_socket)
+        else:
+            connection = asyncio.open_connection(self.host, self.port)
+        self.reader, self.writer = await connection
+
+    async def request(self, method, path, payload=None):
+        """
+        Sends a request and reads the response.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            payload (dict, optional): The JSON body.
+
+        Returns:
+            tuple: The status code and the decoded JSON body.
+        """
+        body = b"" if payload is None else json.dumps(payload).encode()
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+def make_uploads(data_path, columns, upload_size):
+    """
+    Cut the sessions of a recording into uploads of consecutive readings.
+
+    Args:
+        data_path (str): Path to the sensor data CSV file, with an ID column.
+        columns (list of str): The input columns reported by the server.
+        upload_size (int): The number of readings per upload.
+
+    Returns:
+        list: JSON-ready uploads, each a list of readings.
+    """
+    df = pd.read_csv(data_path)
+    uploads = []
+    for _, session in df.groupby("ID", sort=False):
+        values = session[columns].to_numpy(dtype=np.float32)
+        for start in range(0, len(values) - upload_size + 1, upload_size):
+            uploads.append(values[start : start + upload_size].tolist())
+    if not uploads:
+        raise ValueError("No session is long enough for one upload")
+    return uploads
+
+
+async def client(connection, uploads, offset, deadline, latencies, statuses, backoff):
+    """
+    Sends uploads back to back until the deadline, pausing after rejected requests.
+
+    Args:
+        connection (Connection): An open connection.
+        uploads (list): The uploads to cycle through.
+        offset (int): The first upload this client sends.
+        deadline (float): time.monotonic() value at which to stop.
+        latencies (list): Receives the latency of every successful request.
+        statuses (dict): Counts the responses by status code.
+        backoff (float): Seconds to wait after a 503 response.
+    """
+    i = offset
+    while time.monotonic() < deadline:
+        upload = uploads[i % len(uploads)]
+        start = time.perf_counter()
+        status, _ = await connection.request("POST", "/predict", {"readings": upload})
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        elif status == 503:
+            await asyncio.sleep(backoff)
+        statuses[status] = statuses.get(status, 0) + 1
+        i += 1
+
+
+async def run(args):
+    connections = [
+        Connection(args.host, args.port, args.unix_socket)
+        for _ in range(args.connections)
+    ]
+    await asyncio.gather(*(connection.open() for connection in connections))
+    _, info = await connections[0].request("GET", "/info")
+    uploads = make_uploads(args.data_path, info["input_columns"], args.upload_size)
+    print(
+        f"Sending {args.upload_size}-reading uploads to the {info['model']} model "
+        f"over {args.connections} connections for {args.duration}s"
+    )
+
+    latencies, statuses = [], {}
+    start = time.monotonic()
+    deadline = start + args.duration
+    await asyncio.gather(
+        *(
+            client(connection, uploads, i, deadline, latencies, statuses, args.backoff)
+            for i, connection in enumerate(connections)
+        )
+    )
+    elapsed = time.monotonic() - start
+    _, health = await connections[0].request("GET", "/health")
+    for connection in connections:
+        connection.close()
+
+    print(f"Responses: {dict(sorted(statuses.items()))}")
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+        print(
+            f"Throughput: {len(latencies) / elapsed:.0f} uploads/s, "
+            f"{len(latencies) * args.upload_size / elapsed:.0f} readings/s"
+        )
+        print(
+            f"Latency: p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms, "
+            f"max {max(latencies) * 1e3:.1f}ms"
+        )
+    print(f"Mean server batch size: {health['mean_batch_size']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput and tail latency of the scoring server."
+    )
+    parser.add_argument("data_path", type=str, help="Sensor data CSV file to replay")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix_socket", type=str, default=None)
+    parser.add_argument(
+        "--connections", type=int, default=64, help="Concurrent simulated devices"
+    )
+    parser.add_argument("--upload_size", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=0.05,
+        help="Seconds a client waits after the server rejects a request",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# The model directories hold modules with the same names (preprocess, model), so a
+# process imports from exactly one of them, chosen by load_scorer
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_KINDS = ["randomforest", "svm", "lstm"]
+# Upload index of every reading; separates uploads like sessions in the training data
+GROUP_COLUMN = "ID"
+
+
+class Scorer:
+    """
+    Scores uploads of raw sensor readings, many uploads per vectorized model call.
+
+    An upload is a run of consecutive readings from one device. Subclasses cut all
+    uploads of a micro-batch into windows, never across two uploads, and return class
+    probabilities per window; an upload's activity is the mean over its windows.
+
+    Attributes:
+        input_columns (list of str): The raw columns every reading must contain, in order.
+        classes (np.ndarray): The activity labels, ordered as the probability columns.
+    """
+
+    input_columns = []
+    classes = np.array([])
+
+    def predict_windows(self, df):
+        """
+        Computes class probabilities for every window of a frame of uploads.
+
+        Args:
+            df (pd.DataFrame): The readings of all uploads in input_columns, with the
+                upload index in GROUP_COLUMN.
+
+        Returns:
+            tuple: The upload index of every window and the window class probabilities
+                of shape (n_windows, n_classes).
+        """
+        raise NotImplementedError
+
+    def score(self, uploads):
+        """
+        Scores a micro-batch of uploads with one call of predict_windows.
+
+        Args:
+            uploads (list of np.ndarray): Readings of shape (n_readings, len(input_columns)).
+
+        Returns:
+            list of dict: Per upload, the predicted activity (None when the upload is too
+                short for a single window), the class probabilities and the window count.
+        """
+        lengths = [len(upload) for upload in uploads]
+        values = np.concatenate(uploads).astype(np.float32)
+        df = pd.DataFrame(values, columns=self.input_columns)
+        df[GROUP_COLUMN] = np.repeat(np.arange(len(uploads)), lengths)
+        windows, probabilities = self.predict_windows(df)
+
+        counts = np.bincount(windows, minlength=len(uploads))
+        sums = np.zeros((len(uploads), len(self.classes)))
+        np.add.at(sums, windows, probabilities)
+        results = []
+        for count, total in zip(counts, sums):
+            if count == 0:
+                empty = {"activity": None, "probabilities": None, "n_windows": 0}
+                results.append(empty)
+                continue
+            mean = total / count
+            results.append(
+                {
+                    "activity": str(self.classes[np.argmax(mean)]),
+                    "probabilities": dict(zip(map(str, self.classes), mean.tolist())),
+                    "n_windows": int(count),
+                }
+            )
+        return results
+
+
+class RandomForestScorer(Scorer):
+    """Scores uploads with the SimpleRandomForest and pipeline saved by randomforest/train.py."""
+
+    def __init__(
+        self, model_path="simple_random_forest.srf", pipeline_path="rf_pipeline.joblib"
+    ):
+        """
+        Args:
+            model_path (str): The forest saved with SimpleRandomForest.save.
+            pipeline_path (str): The pipeline saved with preprocess.save_pipeline.
+        """
+        from model import SimpleRandomForest
+        from preprocess import generate_features, load_pipeline
+        from streaming_inference import StreamingForest
+
+        self.generate_features = generate_features
+        self.pipeline = load_pipeline(pipeline_path)
+        # The forest file is memory-mapped, so worker processes share one copy of it.
+        # The streaming scorer resolves the input columns and stacks the trees
+        forest = SimpleRandomForest.load(model_path)
+        streaming = StreamingForest(forest, self.pipeline, 1)
+        self.forest = streaming.forest
+        self.input_columns = streaming.input_columns
+        self.classes = self.forest.classes_
+
+    def predict_windows(self, df):
+        sensor_columns = self.pipeline["sensor_columns"]
+        df[sensor_columns] = self.pipeline["scaler"].transform(df[sensor_columns])
+        # Rows without a full window within their upload are dropped
+        df = self.generate_features(df)
+        X = df[self.pipeline["feature_columns"]].to_numpy()
+        return df[GROUP_COLUMN].to_numpy(), self.forest.predict_proba(X)
+
+
+class SVMScorer(Scorer):
+    """
+    Scores uploads with the SVM and pipeline saved by svm/train.py.
+
+    Window probabilities are one-hot votes of predict, since the SVM is not calibrated
+    by default.
+    """
+
+    def __init__(
+        self, model_path="svm_model.joblib", pipeline_path="svm_pipeline.joblib"
+    ):
+        """
+        Args:
+            model_path (str): The model saved with joblib by svm/train.py.
+            pipeline_path (str): The pipeline saved with preprocess.save_pipeline.
+        """
+        import joblib
+        from preprocess import generate_rolling_features, load_pipeline, project
+
+        self.generate_rolling_features = generate_rolling_features
+        self.project = project
+        self.model = joblib.load(model_path)
+        self.pipeline = load_pipeline(pipeline_path)
+        self.input_columns = self.pipeline["input_columns"]
+        self.classes = np.asarray(self.model.classes_)
+
+    def predict_windows(self, df):
+        pipeline = self.pipeline
+        sensor_columns = pipeline["sensor_columns"]
+        df = self.generate_rolling_features(
+            df, sensor_columns, pipeline["window_size"], GROUP_COLUMN
+        )
+        if len(df) == 0:  # Every upload is shorter than one window
+            return df[GROUP_COLUMN].to_numpy(), np.empty((0, len(self.classes)))
+        df[sensor_columns] = pipeline["scaler"].transform(df[sensor_columns])
+        X = df[pipeline["feature_columns"]].to_numpy()
+        if pipeline["pca"] is not None:
+            mean, components = pipeline["pca"]
+            X = self.project(X, components, mean @ components.T)
+        predictions = self.model.predict(X)
+        probabilities = (predictions[:, None] == self.classes).astype(np.float64)
+        return df[GROUP_COLUMN].to_numpy(), probabilities
+
+
+class LSTMScorer(Scorer):
+    """Scores uploads with the LSTM and preprocessing objects saved by lstm/model_tf.py."""
+
+    def __init__(
+        self,
+        model_path="lstm_activity_model.h5",
+        scaler_path="scaler.joblib",
+        label_encoder_path="label_encoder.joblib",
+    ):
+        """
+        Args:
+            model_path (str): The saved Keras model.
+            scaler_path (str): The scaler fitted on the training sensor data.
+            label_encoder_path (str): The encoder of the activity labels.
+        """
+        import joblib
+        from keras.models import load_model
+        from model_tf import CONFIG
+        from preprocess import create_sequences, window_starts
+
+        self.config = CONFIG
+        self.create_sequences = create_sequences
+        self.window_starts = window_starts
+        self.model = load_model(model_path, compile=False)
+        self.scaler = joblib.load(scaler_path)
+        self.input_columns = CONFIG["sensor_columns"]
+        self.classes = joblib.load(label_encoder_path).classes_
+
+    def predict_windows(self, df):
+        config = self.config
+        columns = config["sensor_columns"]
+        df[columns] = self.scaler.transform(df[columns])
+        df["Activity"] = 0  # create_sequences also gathers labels
+        starts = self.window_starts(
+            df, config["window_size"], config["step_size"], GROUP_COLUMN
+        )
+        X, _ = self.create_sequences(
+            df, config["window_size"], config["step_size"], columns, starts
+        )
+        windows = df[GROUP_COLUMN].to_numpy()[starts]
+        if len(X) == 0:
+            return windows, np.empty((0, len(self.classes)))
+        # Batches are padded to a power of two so the model is traced for few shapes
+        batch = np.zeros((1 << (len(X) - 1).bit_length(), *X.shape[1:]), np.float32)
+        batch[: len(X)] = X
+        probabilities = np.asarray(self.model.predict_on_batch(batch))[: len(X)]
+        return windows, probabilities
+
+
+SCORERS = {
+    "randomforest": RandomForestScorer,
+    "svm": SVMScorer,
+    "lstm": LSTMScorer,
+}
+
+
+def load_scorer(kind, **artifacts):
+    """
+    Imports the modules of one model directory and loads its scorer.
+
+    Args:
+        kind (str): One of MODEL_KINDS.
+        **artifacts: Artifact paths passed to the scorer; omitted ones use its defaults.
+
+    Returns:
+        Scorer: The loaded scorer.
+    """
+    if kind not in SCORERS:
+        raise ValueError(f"Unknown model kind {kind}, expected one of {MODEL_KINDS}")
+    sys.path.insert(0, os.path.join(MODELS_DIR, kind))
+    artifacts = {key: path for key, path in artifacts.items() if path is not None}
+    return SCORERS[kind](**artifacts)
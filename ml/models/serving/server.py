@@ -0,0 +1,458 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from scorers import MODEL_KINDS, load_scorer
+
+# Readings of the upload scored at startup, enough for a window of every model
+WARM_UP_READINGS = 100
+
+# Scorer loaded in each worker process, set by _init_worker
+_worker = {}
+
+
+def warm_up(scorer, max_batch_size):
+    """
+    Scores batches of zeros of every power-of-two size up to max_batch_size, so the first
+    requests do not pay for lazy initialization or tracing of the model.
+
+    Args:
+        scorer (Scorer): The loaded scorer.
+        max_batch_size (int): The largest number of uploads per batch.
+
+    Returns:
+        tuple: The scorer's input columns and activity labels.
+    """
+    upload = np.zeros((WARM_UP_READINGS, len(scorer.input_columns)), np.float32)
+    for shift in range(max(max_batch_size, 1).bit_length()):
+        scorer.score([upload] * (1 << shift))
+    return list(scorer.input_columns), [str(label) for label in scorer.classes]
+
+
+def _init_worker(kind, artifacts):
+    """
+    Loads the scorer once per worker process.
+
+    Args:
+        kind (str): The model kind.
+        artifacts (dict): Artifact paths passed to load_scorer.
+    """
+    # The server process handles Ctrl+C and shuts the pool down, and a worker exits
+    # when the server process dies without doing so
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    threading.Thread(target=_exit_with_parent, daemon=True).start()
+    _worker["scorer"] = load_scorer(kind, **artifacts)
+
+
+def _exit_with_parent():
+    """Waits for the server process to end and exits the worker process."""
+    multiprocessing.connection.wait([multiprocessing.parent_process().sentinel])
+    os._exit(1)
+
+
+def _warm_up_worker(max_batch_size):
+    """Warms up the scorer of a worker process and returns its columns and labels."""
+    return warm_up(_worker["scorer"], max_batch_size)
+
+
+def _score_in_worker(uploads):
+    """
+    Scores a micro-batch in a worker process.
+
+    Args:
+        uploads (list of np.ndarray): The readings of every upload.
+
+    Returns:
+        list of dict: The result of every upload.
+    """
+    return _worker["scorer"].score(uploads)
+
+
+class Overloaded(Exception):
+    """Raised when the request queue is full and a request is rejected."""
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into micro-batches scored by one vectorized call.
+
+    Requests wait in a bounded queue. A batch is closed when it holds max_batch_size
+    uploads or when its oldest upload has waited max_delay seconds, whichever comes
+    first, and is scored in an executor so the event loop keeps accepting requests. At
+    most max_in_flight batches are scored at once; while all are busy the next batch
+    keeps filling, and once the queue is full new requests are rejected right away
+    instead of piling up latency.
+    """
+
+    def __init__(
+        self,
+        score,
+        executor,
+        max_batch_size=64,
+        max_delay=0.005,
+        max_queue=1024,
+        max_in_flight=1,
+    ):
+        """
+        Args:
+            score (callable): Scores a list of uploads in the executor.
+            executor (concurrent.futures.Executor): Runs score off the event loop.
+            max_batch_size (int): The largest number of uploads per batch.
+            max_delay (float): Seconds the first upload of a batch may wait for others.
+            max_queue (int): The number of queued uploads beyond which requests are
+                rejected.
+            max_in_flight (int): The number of batches scored concurrently.
+        """
+        self.score = score
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.batch_sizes = []
+
+    async def submit(self, upload):
+        """
+        Queues an upload and waits for its result.
+
+        Args:
+            upload (np.ndarray): The readings of one upload.
+
+        Returns:
+            dict: The scorer's result for the upload.
+
+        Raises:
+            Overloaded: If the queue is full.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((time.monotonic(), upload, future))
+        except asyncio.QueueFull:
+            raise Overloaded() from None
+        return await future
+
+    async def next_batch(self):
+        """
+        Waits for the next batch, bounded by max_batch_size and max_delay.
+
+        Returns:
+            list: The (enqueue time, upload, future) entries of the batch.
+        """
+        batch = [await self.queue.get()]
+        deadline = batch[0][0] + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and self.queue.empty():
+                break
+            try:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        """Forms batches forever and scores each one in the executor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free slot first, so requests keep accumulating into this batch
+            await self.slots.acquire()
+            batch = await self.next_batch()
+            self.batch_sizes.append(len(batch))
+            uploads = [upload for _, upload, _ in batch]
+            task = loop.run_in_executor(self.executor, self.score, uploads)
+            task.add_done_callback(lambda done, batch=batch: self.resolve(batch, done))
+
+    def resolve(self, batch, done):
+        """
+        Hands the results of a scored batch to the waiting requests.
+
+        Args:
+            batch (list): The (enqueue time, upload, future) entries of the batch.
+            done (asyncio.Future): The finished scoring call.
+        """
+        self.slots.release()
+        error = done.exception()
+        results = [None] * len(batch) if error else done.result()
+        for (_, _, future), result in zip(batch, results):
+            if future.done():  # The client went away
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class ScoringServer:
+    """
+    A minimal HTTP/1.1 server in front of a MicroBatcher.
+
+    Endpoints:
+        GET /health: Queue depth and mean batch size.
+        GET /info: The model kind, the input columns every reading must contain and the
+            activity labels.
+        POST /predict: Scores one upload, {"readings": [[...], ...]} with one row per
+            reading in input_columns order. Answers 503 with Retry-After when
+            overloaded.
+    """
+
+    def __init__(self, batcher, kind, input_columns, classes):
+        """
+        Args:
+            batcher (MicroBatcher): Scores the uploads.
+            kind (str): The model kind.
+            input_columns (list of str): The raw columns of every reading.
+            classes (list): The activity labels.
+        """
+        self.batcher = batcher
+        self.info = {
+            "model": kind,
+            "input_columns": list(input_columns),
+            "classes": [str(label) for label in classes],
+        }
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of one keep-alive connection.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's input.
+            writer (asyncio.StreamWriter): The connection's output.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload, extra = await self.route(method, path, body)
+                self.respond(writer, status, payload, extra)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        """
+        Dispatches a request.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            body (bytes): The request body.
+
+        Returns:
+            tuple: The status line, the JSON payload and extra headers.
+        """
+        if method == "GET" and path == "/health":
+            sizes = self.batcher.batch_sizes[-1000:]
+            return "200 OK", {
+                "status": "ok",
+                "queued": self.batcher.queue.qsize(),
+                "mean_batch_size": float(np.mean(sizes)) if sizes else 0.0,
+            }, {}
+        if method == "GET" and path == "/info":
+            return "200 OK", self.info, {}
+        if method != "POST" or path != "/predict":
+            return "404 Not Found", {"error": f"No route for {method} {path}"}, {}
+
+        n_columns = len(self.info["input_columns"])
+        try:
+            readings = np.asarray(json.loads(body)["readings"], dtype=np.float32)
+            if readings.ndim != 2 or readings.shape[1] != n_columns:
+                raise ValueError(f"readings must be rows of {n_columns} values")
+        except (KeyError, TypeError, ValueError) as e:
+            return "400 Bad Request", {"error": str(e)}, {}
+        try:
+            result = await self.batcher.submit(readings)
+        except Overloaded:
+            retry = {"Retry-After": "1"}
+            return "503 Service Unavailable", {"error": "Overloaded"}, retry
+        except Exception as e:
+            return "500 Internal Server Error", {"error": str(e)}, {}
+        return "200 OK", result, {}
+
+    @staticmethod
+    def respond(writer, status, payload, extra_headers):
+        """
+        Writes a JSON response.
+
+        Args:
+            writer (asyncio.StreamWriter): The connection's output.
+            status (str): The status code and reason.
+            payload (dict): The JSON body.
+            extra_headers (dict): Additional response headers.
+        """
+        body = json.dumps(payload).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            **extra_headers,
+        }
+        head = f"HTTP/1.1 {status}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+
+async def serve(args):
+    artifacts = {
+        "model_path": args.model_path,
+        "pipeline_path": args.pipeline_path,
+        "scaler_path": args.scaler_path,
+        "label_encoder_path": args.label_encoder_path,
+    }
+    # The LSTM reads its preprocessing from separate files and has no pipeline file
+    if args.model == "lstm":
+        artifacts.pop("pipeline_path")
+    else:
+        artifacts.pop("scaler_path")
+        artifacts.pop("label_encoder_path")
+
+    # The model and pipeline are loaded once, in this process or in every worker. Workers
+    # are spawned rather than forked, so they inherit neither locks held by threads of an
+    # imported model (TensorFlow) nor the listening socket, and the parent never loads
+    # the model itself
+    loop = asyncio.get_running_loop()
+    if args.executor == "process":
+        executor = ProcessPoolExecutor(
+            args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(args.model, artifacts),
+        )
+        score = _score_in_worker
+        warming = [
+            loop.run_in_executor(executor, _warm_up_worker, args.max_batch_size)
+            for _ in range(args.workers)
+        ]
+    else:
+        executor = ThreadPoolExecutor(args.workers)
+        scorer = load_scorer(args.model, **artifacts)
+        score = scorer.score
+        warming = [
+            loop.run_in_executor(executor, warm_up, scorer, args.max_batch_size)
+        ]
+
+    # SIGINT and SIGTERM drop the queued batches and unwind serve, which then waits for
+    # the workers to exit
+    main_task = asyncio.current_task()
+
+    def stop():
+        executor.shutdown(wait=False, cancel_futures=True)
+        main_task.cancel()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop)
+    batching = None
+    try:
+        # The pool is up and warm before the first connection is accepted
+        input_columns, classes = (await asyncio.gather(*warming))[0]
+        batcher = MicroBatcher(
+            score,
+            executor,
+            max_batch_size=args.max_batch_size,
+            max_delay=args.max_delay_ms / 1000,
+            max_queue=args.max_queue,
+            max_in_flight=args.workers,
+        )
+        server = ScoringServer(batcher, args.model, input_columns, classes)
+
+        if args.unix_socket:
+            listener = await asyncio.start_unix_server(
+                server.handle, path=args.unix_socket
+            )
+            address = args.unix_socket
+        else:
+            listener = await asyncio.start_server(server.handle, args.host, args.port)
+            address = f"http://{args.host}:{args.port}"
+        print(f"Serving the {args.model} model on {address}")
+        batching = asyncio.create_task(batcher.run())
+        async with listener:
+            await listener.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if batching is not None:
+            batching.cancel()
+        executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a trained activity model with micro-batched scoring."
+    )
+    parser.add_argument("model", choices=MODEL_KINDS, help="The kind of model to serve")
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        default=None,
+        help="Saved model; the training script's default if omitted",
+    )
+    parser.add_argument(
+        "--pipeline_path",
+        type=str,
+        default=None,
+        help="Saved preprocessing pipeline of the randomforest and svm models",
+    )
+    parser.add_argument("--scaler_path", type=str, default=None, help="LSTM scaler")
+    parser.add_argument(
+        "--label_encoder_path", type=str, default=None, help="LSTM label encoder"
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--unix_socket",
+        type=str,
+        default=None,
+        help="Listen on this Unix socket instead of TCP",
+    )
+    parser.add_argument("--max_batch_size", type=int, default=64)
+    parser.add_argument(
+        "--max_delay_ms",
+        type=float,
+        default=5.0,
+        help="How long the first upload of a batch waits for others",
+    )
+    parser.add_argument(
+        "--max_queue",
+        type=int,
+        default=1024,
+        help="Queued uploads beyond which requests are rejected with 503",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Score batches in a thread pool or in worker processes",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent batches")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from scorers import MODEL_KINDS, MODELS_DIR, load_scorer
+from server import MicroBatcher, ScoringServer
+
+SENSOR_COLUMNS = [
+    f"{sensor}_{axis}" for sensor in ("Acc", "Gyro", "Mag") for axis in ("X", "Y", "Z")
+]
+
+
+def write_recording(path, n_sessions=4, session_length=150, seed=0):
+    """Write a small sensor recording with the columns of the real data."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_sessions * session_length
+    values = rng.normal(size=(n_rows, len(SENSOR_COLUMNS)))
+    df = pd.DataFrame(values, columns=SENSOR_COLUMNS)
+    df.insert(0, "ID", np.repeat(np.arange(1, n_sessions + 1), session_length))
+    activities = np.resize(["sitting", "walking"], n_sessions)
+    df.insert(1, "Activity", np.repeat(activities, session_length))
+    df["Barometer"] = 1013 + rng.normal(size=n_rows)
+    df["GPS_Lat"] = rng.normal(size=n_rows) * 1e-4
+    df["GPS_Long"] = rng.normal(size=n_rows) * 1e-4
+    df["Pedometer"] = np.arange(n_rows) % 50
+    df.to_csv(path, index=False)
+
+
+def train_randomforest(data_path, out_dir):
+    from model import SimpleRandomForest
+    from preprocess import preprocess_data
+
+    pipeline_path = os.path.join(out_dir, "rf_pipeline.joblib")
+    df = preprocess_data(data_path, pipeline_path=pipeline_path)
+    forest = SimpleRandomForest(n_estimators=3, max_depth=3, random_state=0)
+    X = df.drop(columns=["Activity", "ID"]).to_numpy()
+    forest.fit(X, df["Activity"].to_numpy())
+    model_path = os.path.join(out_dir, "simple_random_forest.srf")
+    forest.save(model_path)
+    return {"model_path": model_path, "pipeline_path": pipeline_path}
+
+
+def train_svm(data_path, out_dir):
+    import joblib
+    from model import ActivitySVM
+    from preprocess import preprocess_data
+
+    pipeline_path = os.path.join(out_dir, "svm_pipeline.joblib")
+    df = preprocess_data(data_path, pipeline_path=pipeline_path)
+    model = ActivitySVM(random_state=0)
+    X = df.drop(columns=["Activity", "ID"]).to_numpy()
+    model.fit(X, df["Activity"].to_numpy())
+    model_path = os.path.join(out_dir, "svm_model.joblib")
+    joblib.dump(model, model_path)
+    return {"model_path": model_path, "pipeline_path": pipeline_path}
+
+
+def train_lstm(data_path, out_dir):
+    import joblib
+    from model_tf import CONFIG, build_lstm_model
+    from preprocess import prepare_data
+
+    _, scaler, le = prepare_data(data_path)
+    input_shape = (CONFIG["window_size"], len(CONFIG["sensor_columns"]))
+    model = build_lstm_model(input_shape, len(le.classes_))
+    artifacts = {
+        "model_path": os.path.join(out_dir, "lstm_activity_model.h5"),
+        "scaler_path": os.path.join(out_dir, "scaler.joblib"),
+        "label_encoder_path": os.path.join(out_dir, "label_encoder.joblib"),
+    }
+    model.save(artifacts["model_path"])
+    joblib.dump(scaler, artifacts["scaler_path"])
+    joblib.dump(le, artifacts["label_encoder_path"])
+    return artifacts
+
+
+TRAINERS = {"randomforest": train_randomforest, "svm": train_svm, "lstm": train_lstm}
+
+
+async def post_uploads(scorer, kind, uploads):
+    """Posts uploads concurrently to a server in front of scorer, returning the replies."""
+    with ThreadPoolExecutor(1) as executor:
+        batcher = MicroBatcher(scorer.score, executor, max_delay=0.05)
+        server = ScoringServer(batcher, kind, scorer.input_columns, scorer.classes)
+        batching = asyncio.create_task(batcher.run())
+        responses = await asyncio.gather(
+            *(
+                server.route("POST", "/predict", json.dumps({"readings": upload}))
+                for upload in uploads
+            )
+        )
+        batching.cancel()
+    return [(status, payload) for status, payload, _ in responses]
+
+
+def check_short_uploads(kind, data_path, out_dir):
+    """Trains a small model of one kind and posts short and full uploads to it."""
+    # The trainers import the modules of the model directory, as load_scorer does
+    sys.path.insert(0, os.path.join(MODELS_DIR, kind))
+    scorer = load_scorer(kind, **TRAINERS[kind](data_path, out_dir))
+    df = pd.read_csv(data_path)
+    readings = df[scorer.input_columns].to_numpy().tolist()
+
+    # A batch of only short uploads, then a short upload batched with a full one
+    for uploads in ([readings[:5]], [readings[:5], readings[:100]]):
+        responses = asyncio.run(post_uploads(scorer, kind, uploads))
+        assert [status for status, _ in responses] == ["200 OK"] * len(uploads)
+        short = responses[0][1]
+        assert short == {"activity": None, "probabilities": None, "n_windows": 0}
+    assert responses[1][1]["activity"] in [str(label) for label in scorer.classes]
+
+
+@pytest.mark.parametrize("kind", MODEL_KINDS)
+def test_short_upload_returns_no_activity(tmp_path, kind):
+    if kind == "lstm":
+        pytest.importorskip("tensorflow")
+    data_path = str(tmp_path / "data.csv")
+    write_recording(data_path)
+    # Every model kind is loaded in its own process, as in the server
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), kind, data_path, str(tmp_path)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    assert result.returncode == 0, result.stderr[-3000:]
+
+
+if __name__ == "__main__":
+    check_short_uploads(*sys.argv[1:])
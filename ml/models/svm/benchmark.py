@@ -0,0 +1,87 @@
+import argparse
+import time
+import numpy as np
+from sklearn.datasets import make_classification
+from model import ActivitySVM
+
+
+def make_dataset(n_samples, n_features=20, n_classes=3, seed=0):
+    """
+    Generate a synthetic multi-class dataset with non-linear class boundaries.
+
+    Args:
+        n_samples (int): Number of rows to generate.
+        n_features (int): Number of feature columns.
+        n_classes (int): Number of activity classes.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        tuple: Feature matrix and integer class labels.
+    """
+    return make_classification(
+        n_samples=n_samples,
+        n_features=n_features,
+        n_informative=n_features // 2,
+        n_classes=n_classes,
+        n_clusters_per_class=2,
+        random_state=seed,
+    )
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(sizes, exact_limit, n_components, test_size=10000):
+    """
+    Compare fit time and test accuracy of the exact SVC and the approximate modes.
+
+    Args:
+        sizes (list of int): Numbers of training samples to benchmark.
+        exact_limit (int): Largest size on which the exact SVC is still trained.
+        n_components (int): The dimension of the approximate feature spaces.
+        test_size (int): Number of held-out samples for the accuracy.
+    """
+    models = {
+        "exact SVC": {},
+        "rff + sgd": {"approximation": "rff", "solver": "sgd"},
+        "nystroem + sgd": {"approximation": "nystroem", "solver": "sgd"},
+        "nystroem + liblinear": {"approximation": "nystroem", "solver": "liblinear"},
+    }
+    print(f"{'n_samples':>10} {'model':>22} {'fit (s)':>9} {'accuracy':>9}")
+    for n_samples in sizes:
+        X, y = make_dataset(n_samples + test_size)
+        X_train, y_train = X[:n_samples], y[:n_samples]
+        X_test, y_test = X[n_samples:], y[n_samples:]
+        for name, params in models.items():
+            if not params and n_samples > exact_limit:
+                print(f"{n_samples:>10} {name:>22} {'-':>9} {'-':>9}")
+                continue
+            model = ActivitySVM(n_components=n_components, random_state=0, **params)
+            _, fit_time = time_call(model.train, X_train, y_train)
+            accuracy = np.mean(model.predict(X_test) == y_test)
+            print(f"{n_samples:>10} {name:>22} {fit_time:>9.2f} {accuracy:>9.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the exact and approximate ActivitySVM modes."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[5000, 20000, 50000, 200000, 1000000]
+    )
+    parser.add_argument(
+        "--exact_limit",
+        type=int,
+        default=50000,
+        help="Largest size on which to train the exact kernel SVC",
+    )
+    parser.add_argument("--n_components", type=int, default=500)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.exact_limit, args.n_components)
+
+
+if __name__ == "__main__":
+    main()
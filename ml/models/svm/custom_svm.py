@@ -1,25 +1,163 @@
+import json
+import os
 import numpy as np
 
 
+def hinge_subgradient(X, Y, W, b, lambda_param):
+    """
+    Computes the sub-gradient of the regularized hinge loss over a batch of samples.
+
+    Margins of all samples and all weight vectors come from a single matrix product, so
+    one call replaces a Python loop over the rows of the batch.
+
+    Args:
+        X (np.array): The feature matrix of the batch, of shape (n_samples, n_features).
+        Y (np.array): The targets of the batch, -1 or 1, of shape (n_samples, n_outputs).
+        W (np.array): The weight matrix, of shape (n_outputs, n_features).
+        b (np.array): The bias vector, of shape (n_outputs,).
+        lambda_param (float): The regularization parameter.
+
+    Returns:
+        tuple: The sub-gradients of W and b, averaged over the batch.
+    """
+    margins = Y * (X @ W.T - b)
+    # Only samples inside the margin contribute to the data term
+    violations = np.where(margins < 1, Y, 0.0)
+    grad_W = 2 * lambda_param * W - violations.T @ X / len(X)
+    grad_b = violations.sum(axis=0) / len(X)
+    return grad_W, grad_b
+
+
+def hinge_loss(X, Y, W, b, lambda_param):
+    """
+    Computes the regularized hinge loss, summed over the outputs.
+
+    Args:
+        X (np.array): The feature matrix, of shape (n_samples, n_features).
+        Y (np.array): The targets, -1 or 1, of shape (n_samples, n_outputs).
+        W (np.array): The weight matrix, of shape (n_outputs, n_features).
+        b (np.array): The bias vector, of shape (n_outputs,).
+        lambda_param (float): The regularization parameter.
+
+    Returns:
+        float: The mean hinge loss plus the L2 penalty on W.
+    """
+    margins = Y * (X @ W.T - b)
+    hinge = np.maximum(0.0, 1 - margins).sum(axis=1).mean()
+    return hinge + lambda_param * np.sum(W * W)
+
+
 class SVM:
     """
     Simple implementation of a linear Support Vector Machine (SVM).
     """
 
-    def __init__(self, learning_rate=0.001, lambda_param=0.01, n_iters=1000):
+    # Constructor parameters, stored with every checkpoint
+    PARAMS = (
+        "learning_rate",
+        "lambda_param",
+        "n_iters",
+        "batch_size",
+        "shuffle",
+        "decay",
+        "tol",
+        "n_iter_no_change",
+        "random_state",
+    )
+
+    def __init__(
+        self,
+        learning_rate=0.001,
+        lambda_param=0.01,
+        n_iters=1000,
+        batch_size=1,
+        shuffle=False,
+        decay=0.0,
+        tol=None,
+        n_iter_no_change=5,
+        random_state=None,
+    ):
         """
         Initializes the SVM with specified learning rate, regularization parameter, and number of iterations.
 
+        The defaults reproduce plain per-sample gradient descent in the order of the data.
+        A larger batch_size switches to mini-batch sub-gradient descent, where every update
+        is computed for a whole batch with one matrix product.
+
         Args:
             learning_rate (float): The learning rate for the gradient descent optimization.
             lambda_param (float): The regularization parameter.
             n_iters (int): The number of iterations to run the gradient descent optimization.
+            batch_size (int): The number of samples per update.
+            shuffle (bool): Whether to shuffle the samples before every iteration.
+            decay (float): Learning rate decay; update t uses learning_rate / (1 + decay * t).
+            tol (float, optional): Stop early once the training loss has not improved by at
+                least tol for n_iter_no_change iterations. None disables early stopping.
+            n_iter_no_change (int): The number of iterations without improvement to wait.
+            random_state (int, optional): Seed for the shuffling.
         """
         self.learning_rate = learning_rate
         self.lambda_param = lambda_param
         self.n_iters = n_iters
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.decay = decay
+        self.tol = tol
+        self.n_iter_no_change = n_iter_no_change
+        self.random_state = random_state
         self.w = None
         self.b = None
+        self.n_steps = 0
+        self.n_epochs = 0
+        self.rng = None
+        # Running feature scaler of partial_fit: sample count, mean and sum of squared deviations
+        self.n_seen = 0
+        self.scaler_mean = None
+        self.scaler_m2 = None
+
+    def get_params(self):
+        """
+        Returns the constructor parameters of the model.
+
+        Returns:
+            dict: The parameter names and values.
+        """
+        return {name: getattr(self, name) for name in self.PARAMS}
+
+    def encode_targets(self, y, classes=None):
+        """
+        Converts labels to a target matrix of -1 and 1.
+
+        Args:
+            y (np.array): The labels, where values <= 0 are the negative class.
+            classes (np.array, optional): Unused; the binary SVM has fixed classes.
+
+        Returns:
+            np.array: The targets, of shape (n_samples, 1).
+        """
+        return np.where(np.asarray(y) <= 0, -1.0, 1.0)[:, None]
+
+    def coefficients(self):
+        """
+        Returns the weights as a (n_outputs, n_features) matrix and a bias vector.
+
+        Returns:
+            tuple: The weight matrix and bias vector, or (None, None) if not fitted.
+        """
+        if self.w is None:
+            return None, None
+        return self.w[None, :], np.array([self.b], dtype=float)
+
+    def set_coefficients(self, W, b):
+        """
+        Stores a (1, n_features) weight matrix and bias vector as w and b.
+
+        Args:
+            W (np.array): The weight matrix.
+            b (np.array): The bias vector.
+        """
+        self.w = W[0]
+        self.b = b[0]
 
     def fit(self, X, y):
         """
@@ -29,23 +167,164 @@ class SVM:
             X (np.array): The feature matrix for the training data.
             y (np.array): The target vector for the training data, should be -1 or 1.
         """
-        n_samples, n_features = X.shape
-        y_ = np.where(y <= 0, -1, 1)  # Convert binary labels to -1 and 1
+        X = np.asarray(X, dtype=float)
+        Y = self.encode_targets(y)
 
-        self.w = np.zeros(n_features)
-        self.b = 0
+        W = np.zeros((Y.shape[1], X.shape[1]))
+        b = np.zeros(Y.shape[1])
+        self.n_steps = 0
+        self.rng = np.random.default_rng(self.random_state)
+        # fit trains on the features as given
+        self.n_seen, self.scaler_mean, self.scaler_m2 = 0, None, None
+        self.gradient_descent(X, Y, W, b)
+        self.set_coefficients(W, b)
 
-        # Gradient descent for optimization
+    def partial_fit(self, X, y, classes=None):
+        """
+        Updates the model with one pass over a batch of new samples.
+
+        Weights, the step counter of the learning rate decay and a running feature scaler are
+        kept between calls, so a stream of batches can be learned without retraining. The
+        scaler statistics are merged batch by batch and every batch is standardized with
+        them before the update. Models trained with fit keep using unscaled features.
+
+        Args:
+            X (np.array): The feature matrix of the batch.
+            y (np.array): The labels of the batch.
+            classes (np.array, optional): All class labels, for multi-class models; only
+                needed on the first call if the first batch lacks some classes.
+
+        Returns:
+            SVM: The updated model.
+        """
+        X = np.asarray(X, dtype=float)
+        W, b = self.coefficients()
+        if W is None:
+            Y = self.encode_targets(y, classes)
+            W = np.zeros((Y.shape[1], X.shape[1]))
+            b = np.zeros(Y.shape[1])
+            self.n_steps = 0
+            self.rng = np.random.default_rng(self.random_state)
+            self.n_seen = 0
+            self.scaler_mean = np.zeros(X.shape[1])
+            self.scaler_m2 = np.zeros(X.shape[1])
+        else:
+            Y = self.encode_targets(y)
+            # The arrays are updated in place, so work on copies until the pass completes
+            W, b = W.copy(), b.copy()
+        if self.rng is None:
+            self.rng = np.random.default_rng(self.random_state)
+
+        if self.scaler_mean is not None:
+            self.update_scaler(X)
+            X = self.scale(X)
+        self.descend(X, Y, W, b)
+        self.set_coefficients(W, b)
+        return self
+
+    def update_scaler(self, X):
+        """
+        Merges the mean and variance of a batch into the running scaler statistics.
+
+        Uses the pairwise update of Chan et al., which is exact for any batch sizes and does
+        not suffer from the cancellation of a sum-of-squares formula.
+
+        Args:
+            X (np.array): The feature matrix of the batch.
+        """
+        n_batch = len(X)
+        if n_batch == 0:
+            return
+        batch_mean = X.mean(axis=0)
+        batch_m2 = ((X - batch_mean) ** 2).sum(axis=0)
+        n_total = self.n_seen + n_batch
+        delta = batch_mean - self.scaler_mean
+        self.scaler_mean = self.scaler_mean + delta * (n_batch / n_total)
+        self.scaler_m2 = (
+            self.scaler_m2 + batch_m2 + delta**2 * (self.n_seen * n_batch / n_total)
+        )
+        self.n_seen = n_total
+
+    def scale(self, X):
+        """
+        Standardizes features with the running scaler, if the model has one.
+
+        Args:
+            X (np.array): The feature matrix.
+
+        Returns:
+            np.array: The standardized feature matrix.
+        """
+        if self.scaler_mean is None or self.n_seen == 0:
+            return X
+        std = np.sqrt(self.scaler_m2 / self.n_seen)
+        std[std == 0] = 1.0
+        return (X - self.scaler_mean) / std
+
+    def gradient_descent(self, X, Y, W, b):
+        """
+        Runs mini-batch sub-gradient descent, updating W and b in place.
+
+        Args:
+            X (np.array): The feature matrix for the training data.
+            Y (np.array): The targets, -1 or 1, of shape (n_samples, n_outputs).
+            W (np.array): The weight matrix, of shape (n_outputs, n_features).
+            b (np.array): The bias vector, of shape (n_outputs,).
+        """
+        best_loss, no_improvement = np.inf, 0
+
+        self.n_epochs = 0
         for _ in range(self.n_iters):
-            for idx, x_i in enumerate(X):
-                condition = y_[idx] * (np.dot(x_i, self.w) - self.b) >= 1
-                if condition:
-                    self.w -= self.learning_rate * (2 * self.lambda_param * self.w)
+            self.descend(X, Y, W, b)
+            self.n_epochs += 1
+
+            if self.tol is not None:
+                loss = hinge_loss(X, Y, W, b, self.lambda_param)
+                if loss > best_loss - self.tol:
+                    no_improvement += 1
+                    if no_improvement >= self.n_iter_no_change:
+                        break
                 else:
-                    self.w -= self.learning_rate * (
-                        2 * self.lambda_param * self.w - np.dot(x_i, y_[idx])
-                    )
-                    self.b -= self.learning_rate * y_[idx]
+                    no_improvement = 0
+                best_loss = min(best_loss, loss)
+
+    def descend(self, X, Y, W, b):
+        """
+        Runs one pass of mini-batch updates over the samples, updating W and b in place.
+
+        Args:
+            X (np.array): The feature matrix for the training data.
+            Y (np.array): The targets, -1 or 1, of shape (n_samples, n_outputs).
+            W (np.array): The weight matrix, of shape (n_outputs, n_features).
+            b (np.array): The bias vector, of shape (n_outputs,).
+        """
+        n_samples = len(X)
+        batch_size = max(1, min(self.batch_size, n_samples))
+        if self.shuffle:
+            order = self.rng.permutation(n_samples)
+        for start in range(0, n_samples, batch_size):
+            # Without shuffling, batches are contiguous slices and need no copy
+            if self.shuffle:
+                rows = order[start : start + batch_size]
+            else:
+                rows = slice(start, start + batch_size)
+            grad_W, grad_b = hinge_subgradient(X[rows], Y[rows], W, b, self.lambda_param)
+            learning_rate = self.learning_rate / (1 + self.decay * self.n_steps)
+            W -= learning_rate * grad_W
+            b -= learning_rate * grad_b
+            self.n_steps += 1
+
+    def decision_function(self, X):
+        """
+        Computes the signed distance of every sample to the hyperplane, up to scale.
+
+        Args:
+            X (np.array): The feature matrix for the data to score.
+
+        Returns:
+            np.array: The scores, of shape (n_samples,).
+        """
+        return np.dot(self.scale(np.asarray(X, dtype=float)), self.w) - self.b
 
     def predict(self, X):
         """
@@ -57,5 +336,185 @@ class SVM:
         Returns:
             np.array: The predicted classes.
         """
-        approx = np.dot(X, self.w) - self.b
+        approx = self.decision_function(X)
         return np.sign(approx)
+
+    def save_checkpoint(self, path):
+        """
+        Saves the weights, optimizer state and scaler statistics to an .npz file.
+
+        The file is written next to path and renamed into place, so a worker interrupted
+        while saving never leaves a truncated checkpoint behind.
+
+        Args:
+            path (str): The checkpoint file path.
+
+        Raises:
+            ValueError: If the model has not been trained yet.
+        """
+        W, b = self.coefficients()
+        if W is None:
+            raise ValueError("The model has not been trained yet")
+        state = {
+            "model": type(self).__name__,
+            "params": self.get_params(),
+            "n_steps": self.n_steps,
+            "n_epochs": self.n_epochs,
+            "n_seen": self.n_seen,
+            "rng": self.rng.bit_generator.state if self.rng is not None else None,
+        }
+        # Labels go in the JSON state, as str labels would be a pickled object array
+        if getattr(self, "classes_", None) is not None:
+            classes = np.asarray(self.classes_)
+            state["classes"] = classes.tolist()
+            state["classes_dtype"] = None if classes.dtype == object else classes.dtype.str
+        arrays = {"W": W, "b": b}
+        if self.scaler_mean is not None:
+            arrays["scaler_mean"] = self.scaler_mean
+            arrays["scaler_m2"] = self.scaler_m2
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, state=np.array(json.dumps(state)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_checkpoint(cls, path):
+        """
+        Restores a model saved with save_checkpoint, ready for further partial_fit calls.
+
+        Args:
+            path (str): The checkpoint file path.
+
+        Returns:
+            SVM: The restored model.
+
+        Raises:
+            ValueError: If the checkpoint was saved by a different model class.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            state = json.loads(str(data["state"]))
+            if state["model"] != cls.__name__:
+                raise ValueError(
+                    f"Checkpoint holds a {state['model']}, not a {cls.__name__}"
+                )
+            model = cls(**state["params"])
+            if "classes" in state:
+                classes_dtype = state["classes_dtype"]
+                model.classes_ = np.array(
+                    state["classes"],
+                    dtype=object if classes_dtype is None else classes_dtype,
+                )
+            model.set_coefficients(data["W"], data["b"])
+            if "scaler_mean" in data:
+                model.scaler_mean = data["scaler_mean"]
+                model.scaler_m2 = data["scaler_m2"]
+        model.n_steps = state["n_steps"]
+        model.n_epochs = state["n_epochs"]
+        model.n_seen = state["n_seen"]
+        if state["rng"] is not None:
+            model.rng = np.random.default_rng()
+            model.rng.bit_generator.state = state["rng"]
+        return model
+
+
+class OneVsRestSVM(SVM):
+    """
+    Multi-class linear SVM trained one-vs-rest.
+
+    The K binary problems are stacked into one weight matrix of shape (K, n_features) and
+    trained together, so every batch update costs one matrix product for all classes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the SVM with the same parameters as SVM.
+        """
+        super().__init__(*args, **kwargs)
+        self.W = None
+        self.classes_ = None
+
+    def encode_targets(self, y, classes=None):
+        """
+        Converts class labels to one -1/1 target column per class.
+
+        The classes are taken from classes, or else from y, the first time labels are
+        encoded; later labels must belong to them.
+
+        Args:
+            y (np.array): The class labels.
+            classes (np.array, optional): All class labels.
+
+        Returns:
+            np.array: The targets, of shape (n_samples, n_classes).
+
+        Raises:
+            ValueError: If y contains a label outside the known classes.
+        """
+        y = np.asarray(y)
+        if self.classes_ is None:
+            self.classes_ = np.unique(np.asarray(classes if classes is not None else y))
+        y_encoded = np.searchsorted(self.classes_, y)
+        known = y_encoded < len(self.classes_)
+        known[known] = self.classes_[y_encoded[known]] == y[known]
+        if not known.all():
+            raise ValueError("y contains labels that are not among the known classes")
+
+        # Column k holds the -1/1 targets of the problem "class k against the rest"
+        Y = np.full((len(y), len(self.classes_)), -1.0)
+        Y[np.arange(len(y)), y_encoded] = 1.0
+        return Y
+
+    def coefficients(self):
+        """
+        Returns the weight matrix and bias vector.
+
+        Returns:
+            tuple: The weight matrix and bias vector, or (None, None) if not fitted.
+        """
+        return self.W, self.b
+
+    def set_coefficients(self, W, b):
+        """
+        Stores the weight matrix and bias vector.
+
+        Args:
+            W (np.array): The weight matrix, of shape (n_classes, n_features).
+            b (np.array): The bias vector, of shape (n_classes,).
+        """
+        self.W = W
+        self.b = b
+
+    def fit(self, X, y):
+        """
+        Fits one binary SVM per class to the training data.
+
+        Args:
+            X (np.array): The feature matrix for the training data.
+            y (np.array): The target vector for the training data, with any class labels.
+        """
+        self.classes_ = None
+        super().fit(X, y)
+
+    def decision_function(self, X):
+        """
+        Computes the score of every class for every sample.
+
+        Args:
+            X (np.array): The feature matrix for the data to score.
+
+        Returns:
+            np.array: The scores, of shape (n_samples, n_classes).
+        """
+        return self.scale(np.asarray(X, dtype=float)) @ self.W.T - self.b
+
+    def predict(self, X):
+        """
+        Makes predictions using the trained SVM model.
+
+        Args:
+            X (np.array): The feature matrix for the data to make predictions on.
+
+        Returns:
+            np.array: The predicted class labels.
+        """
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
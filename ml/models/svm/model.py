@@ -1,7 +1,18 @@
+import tempfile
 import numpy as np
-from sklearn.svm import SVC
+from sklearn.base import clone
+from sklearn.svm import SVC, LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, classification_report
-from sklearn.model_selection import GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    HalvingRandomSearchCV,
+)
 
 
 class ActivitySVM:
@@ -9,16 +20,113 @@ class ActivitySVM:
     A wrapper class for the Support Vector Machine model to classify physical activities.
     """
 
-    def __init__(self, C=1.0, kernel="rbf", gamma="scale"):
+    def __init__(
+        self,
+        C=1.0,
+        kernel="rbf",
+        gamma="scale",
+        probability=False,
+        approximation=None,
+        n_components=500,
+        solver="sgd",
+        random_state=None,
+    ):
         """
         Initializes the SVM model with specified hyperparameters.
 
+        By default an exact kernel SVC is trained, which scales between O(n^2) and O(n^3)
+        in the number of samples. For large data, approximation maps the samples to an
+        explicit feature space that approximates the kernel, and a linear solver is trained
+        on it in time linear in the number of samples.
+
         Args:
             C (float): Regularization parameter.
             kernel (str): Specifies the kernel type to be used in the algorithm.
             gamma (str or float): Kernel coefficient for 'rbf', 'poly' and 'sigmoid'.
+            probability (bool): Whether to calibrate class probabilities for predict_proba.
+                Calibration refits the model on internal cross-validation folds.
+            approximation (str, optional): None for the exact SVC, "rff" for random Fourier
+                features (RBFSampler, rbf kernel only) or "nystroem" for a Nystroem
+                approximation of the kernel.
+            n_components (int): The dimension of the approximate feature space.
+            solver (str): The linear solver of the approximate mode, "sgd" (SGDClassifier
+                with hinge loss) or "liblinear" (LinearSVC).
+            random_state (int, optional): Seed for the approximation and the solver.
+        """
+        self.gamma = gamma
+        self.C = C
+        self.probability = probability
+        if approximation is None:
+            model = SVC(C=C, kernel=kernel, gamma=gamma, random_state=random_state)
+        else:
+            model = self.approximate_model(
+                kernel, C, approximation, n_components, solver, random_state
+            )
+        # Calibration is opt-in, since it refits the model on every fold
+        if probability:
+            model = CalibratedClassifierCV(model, method="sigmoid", cv=3)
+        self.model = model
+
+    @staticmethod
+    def approximate_model(kernel, C, approximation, n_components, solver, random_state):
+        """
+        Builds a kernel approximation followed by a linear solver.
+
+        Args:
+            kernel (str): The kernel to approximate.
+            C (float): Regularization parameter.
+            approximation (str): "rff" or "nystroem".
+            n_components (int): The dimension of the approximate feature space.
+            solver (str): "sgd" or "liblinear".
+            random_state (int, optional): Seed for the approximation and the solver.
+
+        Returns:
+            Pipeline: The unfitted approximate model.
+        """
+        if approximation == "rff":
+            if kernel != "rbf":
+                raise ValueError("Random Fourier features only approximate the rbf kernel")
+            features = RBFSampler(n_components=n_components, random_state=random_state)
+        elif approximation == "nystroem":
+            features = Nystroem(
+                kernel=kernel, n_components=n_components, random_state=random_state
+            )
+        else:
+            raise ValueError("Unsupported kernel approximation")
+        if solver == "sgd":
+            # alpha is set from C and the number of samples in train
+            classifier = SGDClassifier(loss="hinge", random_state=random_state)
+        elif solver == "liblinear":
+            classifier = LinearSVC(C=C, random_state=random_state)
+        else:
+            raise ValueError("Unsupported linear solver")
+        return Pipeline([("features", features), ("classifier", classifier)])
+
+    def approximate_params(self, X_train):
+        """
+        Resolves the parameters of the approximate mode that depend on the training data.
+
+        gamma="scale" uses 1 / (n_features * X.var()) as in SVC, and the SGD regularization
+        alpha = 1 / (C * n_samples) matches the objective of an SVC with parameter C.
+
+        Args:
+            X_train (array-like): Training features.
+
+        Returns:
+            dict: Parameters to set on the approximate pipeline.
         """
-        self.model = SVC(C=C, kernel=kernel, gamma=gamma, probability=True)
+        X_train = np.asarray(X_train)
+        gamma = self.gamma
+        if gamma == "scale":
+            variance = X_train.var()
+            gamma = 1.0 / (X_train.shape[1] * variance) if variance > 0 else 1.0
+        params = {"features__gamma": gamma}
+        pipeline = self.model.estimator if self.probability else self.model
+        if isinstance(pipeline.named_steps["classifier"], SGDClassifier):
+            params["classifier__alpha"] = 1.0 / (self.C * len(X_train))
+        if self.probability:
+            params = {f"estimator__{name}": value for name, value in params.items()}
+        return params
 
     def train(self, X_train, y_train):
         """
@@ -28,8 +136,30 @@ class ActivitySVM:
             X_train (array-like): Training features.
             y_train (array-like): Training labels.
         """
+        estimator = self.model.estimator if self.probability else self.model
+        if isinstance(estimator, Pipeline):
+            self.model.set_params(**self.approximate_params(X_train))
         self.model.fit(X_train, y_train)
 
+    def fit(self, X_train, y_train):
+        """
+        Trains the SVM model; an alias of train with the scikit-learn name.
+
+        Args:
+            X_train (array-like): Training features.
+            y_train (array-like): Training labels.
+
+        Returns:
+            ActivitySVM: The trained model.
+        """
+        self.train(X_train, y_train)
+        return self
+
+    @property
+    def classes_(self):
+        """np.ndarray: The class labels seen during training."""
+        return self.model.classes_
+
     def predict(self, X_test):
         """
         Performs prediction on the test data.
@@ -42,6 +172,23 @@ class ActivitySVM:
         """
         return self.model.predict(X_test)
 
+    def predict_proba(self, X_test):
+        """
+        Predicts calibrated class probabilities for the test data.
+
+        Args:
+            X_test (array-like): Test features.
+
+        Returns:
+            array: Class probabilities of shape (n_samples, n_classes).
+
+        Raises:
+            ValueError: If the model was created without probability=True.
+        """
+        if not self.probability:
+            raise ValueError("Probability calibration is disabled; use probability=True")
+        return self.model.predict_proba(X_test)
+
     def evaluate(self, X_test, y_test):
         """
         Evaluates the performance of the model on the test data.
@@ -58,22 +205,96 @@ class ActivitySVM:
         report = classification_report(y_test, predictions)
         return {"accuracy": accuracy, "report": report}
 
-    def optimize_parameters(self, X_train, y_train, param_grid, cv=5):
+    def optimize_parameters(
+        self,
+        X_train,
+        y_train,
+        param_grid,
+        cv=5,
+        search="grid",
+        n_jobs=-1,
+        factor=3,
+        n_candidates="exhaust",
+        random_state=None,
+        cache_dir=None,
+    ):
         """
-        Performs hyperparameter tuning using GridSearchCV.
+        Performs hyperparameter tuning using cross-validated search.
+
+        Candidates are evaluated on all cores. With the halving searches, every candidate
+        starts on a small subsample and only the best 1 / factor of them advance to a
+        factor times larger one, so most candidates never see the full data. The search
+        runs on the uncalibrated model; with probability=True only the best candidate is
+        calibrated afterwards. In the approximate mode, the fitted kernel approximation of
+        every fold is cached and reused by all candidates that share its parameters.
 
         Args:
             X_train (array-like): Training features.
             y_train (array-like): Training labels.
             param_grid (dict): Dictionary with parameters names as keys and lists of parameter settings to try as values.
+                For "halving_random", lists or distributions to sample from. In the
+                approximate mode, names are prefixed with "features__" or "classifier__".
             cv (int): Number of folds in cross-validation.
+            search (str): "grid" (GridSearchCV), "halving_grid" (HalvingGridSearchCV) or
+                "halving_random" (HalvingRandomSearchCV).
+            n_jobs (int): Number of parallel jobs, -1 for all cores.
+            factor (int): The factor by which the halving searches cut the candidates and
+                grow the sample count in every round.
+            n_candidates (int or str): Number of sampled candidates of "halving_random".
+            random_state (int, optional): Seed for the subsampling and candidate sampling.
+            cache_dir (str, optional): Directory for the cached fold transformations. By
+                default a temporary directory, removed after the search, is used.
 
         Returns:
             best_params (dict): Parameter setting that gave the best results on the hold out data.
         """
-        grid_search = GridSearchCV(self.model, param_grid, cv=cv)
-        grid_search.fit(X_train, y_train)
-        self.model = (
-            grid_search.best_estimator_
-        )  # Update the model with the best found parameters
-        return grid_search.best_params_
+        estimator = clone(self.model.estimator if self.probability else self.model)
+        if isinstance(estimator, Pipeline):
+            params = self.approximate_params(X_train)
+            if self.probability:
+                params = {
+                    name.removeprefix("estimator__"): value
+                    for name, value in params.items()
+                }
+            estimator.set_params(**params)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if isinstance(estimator, Pipeline):
+                estimator.set_params(memory=cache_dir or tmp_dir)
+            if search == "grid":
+                searcher = GridSearchCV(estimator, param_grid, cv=cv, n_jobs=n_jobs)
+            elif search == "halving_grid":
+                searcher = HalvingGridSearchCV(
+                    estimator,
+                    param_grid,
+                    cv=cv,
+                    factor=factor,
+                    resource="n_samples",
+                    n_jobs=n_jobs,
+                    random_state=random_state,
+                )
+            elif search == "halving_random":
+                searcher = HalvingRandomSearchCV(
+                    estimator,
+                    param_grid,
+                    n_candidates=n_candidates,
+                    cv=cv,
+                    factor=factor,
+                    resource="n_samples",
+                    n_jobs=n_jobs,
+                    random_state=random_state,
+                )
+            else:
+                raise ValueError("Unsupported search mode")
+            searcher.fit(X_train, y_train)
+
+        best = searcher.best_estimator_
+        if isinstance(best, Pipeline):
+            # The cache directory may be gone; the fitted model no longer needs it
+            best.set_params(memory=None)
+        if self.probability:
+            self.model.set_params(estimator=clone(best))
+            self.model.fit(X_train, y_train)
+        else:
+            self.model = best  # Update the model with the best found parameters
+        return searcher.best_params_
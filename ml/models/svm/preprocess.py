@@ -1,9 +1,17 @@
+import os
+import sys
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, IncrementalPCA
 from scipy.fft import rfft
 
+# Code shared by the model directories, which import their own modules flat
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(MODELS_DIR, "common"))
+from preprocess_common import cached_frame, group_train_test_split, session_positions
+
 # Configuration parameters
 CONFIG = {
     "sensor_columns": [
@@ -20,21 +28,32 @@ CONFIG = {
     "window_size": 20,
     "fft_components": 5,
     "pca_components": 0.95,  # Retain 95% of variance
+    "pca_batch_size": 10000,  # Rows per IncrementalPCA batch; None fits a full PCA in memory
     "scaling_method": "standard",  # or "minmax"
+    "group_column": "ID",  # Session identifier; windows never cross its boundaries
+}
+
+# Explicit column dtypes so large files are not parsed as float64/object
+DTYPES = {
+    **{col: "float32" for col in CONFIG["sensor_columns"]},
+    "Barometer": "float32",
+    "Pedometer": "float32",
+    "ID": "int32",
+    "Activity": "category",
 }
 
 
-def load_data(file_path):
-    """Load sensor data from a CSV file."""
+def load_data(file_path, chunksize=None):
+    """Load sensor data from a CSV file, as an iterator of chunks if chunksize is given."""
     try:
-        return pd.read_csv(file_path)
+        return pd.read_csv(file_path, dtype=DTYPES, chunksize=chunksize)
     except Exception as e:
         print(f"Error loading the data: {e}")
         raise
 
 
-def generate_rolling_features(df, columns, window_size=20):
-    """Generate rolling window features for each specified column."""
+def generate_rolling_features(df, columns, window_size=20, group_column=None):
+    """Generate rolling window features for each specified column, per session if grouped."""
     for col in columns:
         df[f"{col}_rolling_mean"] = df[col].rolling(window=window_size).mean()
         df[f"{col}_rolling_std"] = df[col].rolling(window=window_size).std()
@@ -42,41 +61,256 @@ def generate_rolling_features(df, columns, window_size=20):
         df[f"{col}_rolling_max"] = df[col].rolling(window=window_size).max()
         df[f"{col}_diff"] = df[col].diff()  # First derivative
         df[f"{col}_diff2"] = df[col].diff().diff()  # Second derivative
+    if group_column is not None:
+        # Drop rows whose window reaches back into the previous session
+        positions = session_positions(df[group_column])
+        df = df[positions >= max(window_size - 1, 2)]
     return df.dropna()  # Remove rows with NaN values
 
 
-def scale_features(df, columns, method="standard"):
-    """Scale features using specified method: 'standard' or 'minmax'."""
+def make_scaler(method="standard"):
+    """Create an unfitted scaler for the method 'standard' or 'minmax'."""
     if method == "standard":
-        scaler = StandardScaler()
-    elif method == "minmax":
-        scaler = MinMaxScaler()
-    else:
-        raise ValueError("Unsupported scaling method")
+        return StandardScaler()
+    if method == "minmax":
+        return MinMaxScaler()
+    raise ValueError("Unsupported scaling method")
+
+
+def scale_features(df, columns, method="standard"):
+    """Scale features using specified method: 'standard' or 'minmax', returning (df, scaler)."""
+    scaler = make_scaler(method)
     df[columns] = scaler.fit_transform(df[columns])
-    return df
+    return df, scaler
+
+
+def iter_feature_chunks(file_path, chunksize, scaler=None):
+    """
+    Yield the rolling features of a CSV file one chunk at a time, scaled if a scaler is given.
+
+    The last readings of each chunk are carried over in front of the next one, so every
+    window sees the same history as on the whole file; the carried rows are dropped again
+    by generate_rolling_features, which only keeps rows with a full window in the frame.
+    """
+    history = max(CONFIG["window_size"] - 1, 2)
+    carry = None
+    for chunk in load_data(file_path, chunksize):
+        frame = chunk if carry is None else pd.concat([carry, chunk])
+        carry = frame.iloc[-history:]
+        df = generate_rolling_features(
+            frame, CONFIG["sensor_columns"], CONFIG["window_size"], CONFIG["group_column"]
+        )
+        if len(df) == 0:
+            continue
+        if scaler is not None:
+            df[CONFIG["sensor_columns"]] = scaler.transform(df[CONFIG["sensor_columns"]])
+        yield df
+
+
+def fit_incremental_pca(blocks, n_components, batch_size):
+    """
+    Fit PCA with IncrementalPCA over row blocks, returning (mean, components).
+
+    Blocks of any size (e.g. CSV chunks) are regrouped into batches of batch_size rows, and
+    at least n_features rows are held back for the last batch, so every partial_fit call
+    sees enough rows; only one batch is held in memory at a time. All components are
+    tracked, which keeps the incremental fit exact, so a fractional n_components selects
+    the same number of components as PCA(n_components) on all rows.
+    """
+    pca, pending = None, []
+    for block in blocks:
+        block = np.asarray(block, dtype=np.float64)
+        if pca is None:
+            n_features = block.shape[1]
+            batch_size = max(batch_size, n_features)
+            pca = IncrementalPCA(n_components=n_features)
+        pending.append(block)
+        rows = np.concatenate(pending)
+        n_fit = max(len(rows) - n_features, 0) // batch_size * batch_size
+        for start in range(0, n_fit, batch_size):
+            pca.partial_fit(rows[start : start + batch_size])
+        pending = [rows[n_fit:]]
+    if pca is None:
+        raise ValueError("No rows to fit the PCA on")
+    rows = np.concatenate(pending)
+    if len(rows):
+        if not hasattr(pca, "n_samples_seen_"):
+            # Fewer rows than features in total
+            pca.n_components = min(len(rows), n_features)
+        pca.partial_fit(rows)
+    if 0 < n_components < 1:
+        ratio_cumsum = np.cumsum(pca.explained_variance_ratio_)
+        n_components = np.searchsorted(ratio_cumsum, n_components, side="right") + 1
+    return pca.mean_, pca.components_[: int(n_components)]
+
+
+def project(X, components, offset, batch_size=None):
+    """Project rows onto PCA components as X @ components.T - offset, in row batches."""
+    out = np.empty((len(X), len(components)), dtype=np.float32)
+    batch_size = batch_size or max(len(X), 1)
+    for start in range(0, len(X), batch_size):
+        block = np.asarray(X[start : start + batch_size], dtype=np.float64)
+        out[start : start + batch_size] = block @ components.T - offset
+    return out
+
+
+def apply_pca(df, n_components, batch_size=None):
+    """
+    Apply PCA to an in-memory DataFrame while retaining a fraction of the variance.
 
+    With batch_size, the projection is fitted and applied in row batches with IncrementalPCA,
+    so no float64 copy of the whole feature matrix is made; the DataFrame itself is still
+    held in memory (see build_features with a chunksize for files that do not fit). Returns
+    the DataFrame of components and the fitted projection as (mean, components).
+    """
+    if batch_size is None:
+        pca = PCA(n_components=n_components)
+        pca.fit(df)
+        mean, components = pca.mean_, pca.components_
+    else:
+        blocks = (df.iloc[i : i + batch_size] for i in range(0, len(df), batch_size))
+        mean, components = fit_incremental_pca(blocks, n_components, batch_size)
+    offset = mean @ components.T
+    principalComponents = project(df, components, offset, batch_size)
+    return pd.DataFrame(principalComponents), (mean, components)
+
+
+def save_projection(path, mean, components):
+    """Save a fitted PCA projection to an .npz file, with the mean folded into an offset."""
+    np.savez(path, mean=mean, components=components, offset=mean @ components.T)
+
+
+def load_projection(path):
+    """Load a projection saved by save_projection, returning (components, offset) for project."""
+    with np.load(path) as data:
+        return data["components"], data["offset"]
 
-def apply_pca(df, n_components):
-    """Apply PCA to reduce dimensionality while retaining a fraction of the variance."""
-    pca = PCA(n_components=n_components)
-    principalComponents = pca.fit_transform(df)
-    return pd.DataFrame(principalComponents)
 
+def preprocess_data(
+    file_path, cache_dir=None, projection_path=None, pipeline_path=None, chunksize=None
+):
+    """
+    Full preprocessing pipeline transforming raw CSV data into features ready for SVM.
 
-def preprocess_data(file_path):
-    """Full preprocessing pipeline transforming raw CSV data into features ready for SVM."""
+    If chunksize is given, the file is streamed in chunks of this many rows, see
+    build_features. If projection_path is given, the fitted PCA projection is saved there for inference.
+    If pipeline_path is given, everything needed to featurize new readings is saved there.
+    """
+    df, artifacts = cached_frame(
+        file_path, cache_dir, CONFIG, lambda: build_features(file_path, chunksize)
+    )
+    if projection_path is not None and "pca" in artifacts:
+        save_projection(projection_path, *artifacts["pca"])
+    if pipeline_path is not None and "scaler" in artifacts:
+        save_pipeline(pipeline_path, artifacts)
+    return df
+
+
+def build_features(file_path, chunksize=None):
+    """Run the preprocessing pipeline of preprocess_data without caching, returning (df, artifacts)."""
+    if chunksize is not None:
+        return build_features_streaming(file_path, chunksize)
     df = load_data(file_path)
-    df = generate_rolling_features(df, CONFIG["sensor_columns"], CONFIG["window_size"])
+    # Raw columns the features are computed from, as they must be sent for inference
+    input_columns = [
+        col for col in df.columns if col not in (CONFIG["group_column"], "Activity")
+    ]
+    df = generate_rolling_features(
+        df, CONFIG["sensor_columns"], CONFIG["window_size"], CONFIG["group_column"]
+    )
 
     # Generate frequency domain features from time series data
     # for col in CONFIG["sensor_columns"]:
     #     df = np.abs(rfft(df[col], n=CONFIG["fft_components"]))
 
-    df = scale_features(df, CONFIG["sensor_columns"], CONFIG["scaling_method"])
+    df, scaler = scale_features(df, CONFIG["sensor_columns"], CONFIG["scaling_method"])
 
-    # Apply PCA for dimensionality reduction
+    # Apply PCA for dimensionality reduction; the session ID and label are passed through
+    artifacts = {
+        "scaler": scaler,
+        "input_columns": input_columns,
+        "feature_columns": [
+            col for col in df.columns if col not in (CONFIG["group_column"], "Activity")
+        ],
+    }
     if CONFIG["pca_components"] > 0:
-        df = apply_pca(df, CONFIG["pca_components"])
+        passthrough = df[[CONFIG["group_column"], "Activity"]].reset_index(drop=True)
+        components, artifacts["pca"] = apply_pca(
+            df.drop(columns=passthrough.columns),
+            CONFIG["pca_components"],
+            CONFIG["pca_batch_size"],
+        )
+        df = pd.concat([passthrough, components.add_prefix("pc_")], axis=1)
 
-    return df
+    return df, artifacts
+
+
+def build_features_streaming(file_path, chunksize):
+    """
+    Run build_features out of core, reading the file in chunks of chunksize rows.
+
+    The file is read three times: to fit the scaler, to fit the IncrementalPCA batch by batch
+    and to project every chunk as it comes, so only one chunk of features is in memory at a
+    time and the result holds just the session ID, the label and the components.
+    """
+    group_column = CONFIG["group_column"]
+    sensor_columns = CONFIG["sensor_columns"]
+    input_columns = [
+        col
+        for col in pd.read_csv(file_path, nrows=0).columns
+        if col not in (group_column, "Activity")
+    ]
+    scaler = make_scaler(CONFIG["scaling_method"])
+    feature_columns = None
+    for chunk in iter_feature_chunks(file_path, chunksize):
+        scaler.partial_fit(chunk[sensor_columns])
+        if feature_columns is None:
+            feature_columns = [
+                col for col in chunk.columns if col not in (group_column, "Activity")
+            ]
+    artifacts = {
+        "scaler": scaler,
+        "input_columns": input_columns,
+        "feature_columns": feature_columns,
+    }
+
+    projection = None
+    if CONFIG["pca_components"] > 0:
+        blocks = (
+            chunk[feature_columns]
+            for chunk in iter_feature_chunks(file_path, chunksize, scaler)
+        )
+        mean, components = fit_incremental_pca(
+            blocks, CONFIG["pca_components"], CONFIG["pca_batch_size"] or chunksize
+        )
+        artifacts["pca"] = (mean, components)
+        projection = (components, mean @ components.T)
+
+    parts = []
+    for chunk in iter_feature_chunks(file_path, chunksize, scaler):
+        if projection is not None:
+            passthrough = chunk[[group_column, "Activity"]].reset_index(drop=True)
+            components = pd.DataFrame(project(chunk[feature_columns], *projection))
+            chunk = pd.concat([passthrough, components.add_prefix("pc_")], axis=1)
+        parts.append(chunk)
+    df = pd.concat(parts, ignore_index=True)
+    # Each chunk infers its own categories; restore a single categorical dtype
+    df["Activity"] = df["Activity"].astype("category")
+    return df, artifacts
+
+
+def save_pipeline(path, artifacts):
+    """Save the scaler, columns, PCA projection and window size from build_features with joblib."""
+    pipeline = {
+        key: artifacts.get(key)
+        for key in ("scaler", "input_columns", "feature_columns", "pca")
+    }
+    pipeline.update(
+        sensor_columns=CONFIG["sensor_columns"], window_size=CONFIG["window_size"]
+    )
+    joblib.dump(pipeline, path)
+
+
+def load_pipeline(path):
+    """Load a pipeline saved by save_pipeline as a dict."""
+    return joblib.load(path)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from custom_svm import OneVsRestSVM
+
+
+def make_data(n_samples=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, 4))
+    labels = np.array(["Sitting", "Standing", "Walking"])[np.argmax(X[:, :3], axis=1)]
+    return X, labels
+
+
+@pytest.mark.parametrize(
+    "to_labels",
+    [
+        lambda labels: labels.astype(object),
+        lambda labels: pd.Series(labels, dtype="category").values,
+        lambda labels: np.searchsorted(np.unique(labels), labels),
+    ],
+    ids=["str", "categorical", "int"],
+)
+def test_checkpoint_round_trip(tmp_path, to_labels):
+    X, labels = make_data()
+    y = to_labels(labels)
+    model = OneVsRestSVM(n_iters=5, batch_size=32, shuffle=True, random_state=0)
+    model.partial_fit(X[:150], y[:150])
+    path = tmp_path / "svm.npz"
+    model.save_checkpoint(path)
+
+    restored = OneVsRestSVM.load_checkpoint(path)
+    assert restored.classes_.dtype == model.classes_.dtype
+    np.testing.assert_array_equal(restored.classes_, model.classes_)
+    np.testing.assert_array_equal(restored.predict(X), model.predict(X))
+
+    # Training resumes identically from the checkpoint
+    model.partial_fit(X[150:], y[150:])
+    restored.partial_fit(X[150:], y[150:])
+    np.testing.assert_allclose(restored.decision_function(X), model.decision_function(X))
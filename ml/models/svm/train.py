@@ -1,11 +1,11 @@
 import argparse
+import joblib
 import numpy as np
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
-from preprocess import preprocess_data
+from preprocess import CONFIG, preprocess_data, group_train_test_split
 
 from model import ActivitySVM as SklearnSVM
-from custom_svm import SVM as CustomSVM
+from custom_svm import OneVsRestSVM as CustomSVM
 
 
 def train_and_evaluate(model, X_train, X_test, y_train, y_test):
@@ -26,30 +26,103 @@ def main():
     parser.add_argument(
         "--use_custom", action="store_true", help="Use the custom SVM implementation"
     )
+    parser.add_argument(
+        "--approximation",
+        choices=["rff", "nystroem"],
+        default=None,
+        help="Train the sklearn SVM on a kernel approximation for large data",
+    )
+    parser.add_argument(
+        "--n_components",
+        type=int,
+        default=500,
+        help="Dimension of the kernel approximation",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the CSV file in chunks of this many rows to bound memory use",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Cache engineered features here and reuse them on later runs",
+    )
+    parser.add_argument(
+        "--projection_path",
+        type=str,
+        default=None,
+        help="Save the fitted PCA projection here (.npz) for inference",
+    )
+    parser.add_argument(
+        "--pipeline_path",
+        type=str,
+        default="svm_pipeline.joblib",
+        help="Save the fitted scaler, feature columns and projection here for serving",
+    )
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        default="svm_model.joblib",
+        help="Save the trained model here",
+    )
+    parser.add_argument(
+        "--split_path",
+        type=str,
+        default=None,
+        help="JSON file holding the session train/test split, created if missing "
+        "and shared with the other models",
+    )
     args = parser.parse_args()
 
     # Data preprocessing
-    processed_df = preprocess_data(args.data_path)
+    processed_df = preprocess_data(
+        args.data_path,
+        cache_dir=args.cache_dir,
+        projection_path=args.projection_path,
+        pipeline_path=args.pipeline_path,
+        chunksize=args.chunksize,
+    )
 
     # Splitting dataset into features and target
-    X = processed_df.drop("Activity", axis=1).values
+    # The session ID only drives the split and is not a feature
+    X = processed_df.drop(["Activity", CONFIG["group_column"]], axis=1).values
     y = processed_df["Activity"].values
 
-    # Split data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42
+    # Split data into training and testing sets, keeping each session on one side
+    train_rows, test_rows = group_train_test_split(
+        processed_df[CONFIG["group_column"]],
+        test_size=0.3,
+        random_state=42,
+        split_path=args.split_path,
     )
+    X_train, X_test = X[train_rows], X[test_rows]
+    y_train, y_test = y[train_rows], y[test_rows]
 
     # Initialize and select the model
     if args.use_custom:
         print("Using custom SVM implementation.")
-        model = CustomSVM()
+        model = CustomSVM(
+            learning_rate=0.01,
+            batch_size=256,
+            shuffle=True,
+            tol=1e-4,
+            random_state=42,
+        )
     else:
         print("Using sklearn SVM implementation.")
-        model = SklearnSVM()
+        model = SklearnSVM(
+            approximation=args.approximation,
+            n_components=args.n_components,
+            random_state=42,
+        )
 
     # Train and evaluate the model
     train_and_evaluate(model, X_train, X_test, y_train, y_test)
+    joblib.dump(model, args.model_path)
+    print(f"Model saved to {args.model_path}")
 
 
 if __name__ == "__main__":